@@ -1,16 +1,63 @@
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from functools import partial
+from itertools import count
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from wagtail.api.v2.filters import FieldsFilter, OrderingFilter
 from wagtail.api.v2.views import PagesAPIViewSet, BaseAPIViewSet
 from wagtail.api.v2.router import WagtailAPIRouter
 from wagtail.api.v2.serializers import BaseSerializer, Field
+from wagtail.api.v2.utils import BadRequestError, parse_boolean, parse_fields_parameter
+from wagtail.fields import StreamField
 from rest_framework.decorators import api_view
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status, serializers
-from wagtail.models import Page
+from wagtail.models import Page, Site
 from wagtail.images.api.fields import ImageRenditionField
-from navigation.models import NavigationMenu, MenuItem, SubMenuItem
+from faq.models import FAQCollection
+from footer.models import Footer
+from navigation.models import MegaMenu, NavigationMenu, MenuItem, SubMenuItem
+from team.models import TeamMember
+
+from mysite.breadcrumbs import get_breadcrumbs
+from mysite.cache import get_cache_stats, get_content_modified, get_content_version, get_snippet_version
+from mysite.conditional import conditional_response, latest, make_etag, set_validators
+from mysite.navigation_tree import get_navigation_tree
+from mysite.page_plans import get_page_field_names, load_page, render_page
+from mysite.pagination import PagesPagination, get_limit
+from mysite.renderers import get_json_renderer_class, render_json
+from mysite.snapshots import get_snapshot_body, get_snapshot_data
+from mysite.snippets import (
+    PAGE_LINK_SERIALIZERS,
+    SnippetPlan,
+    get_link,
+    get_navigation_menus,
+    get_snippet_group,
+    serialize_active_footer,
+    serialize_category_tree,
+    serialize_faq_categories,
+    serialize_faq_collection,
+)
+from mysite.streamfield import ReferenceResolver, serialize_stream_field
+
+
+class LinkField(serializers.Field):
+    """The link of a navigation entry, without a query for its linked page"""
+
+    def __init__(self, **kwargs):
+        super().__init__(source='*', read_only=True, **kwargs)
+
+    def to_representation(self, entry):
+        return get_link(entry)
 
 
 class SubMenuItemSerializer(serializers.ModelSerializer):
-    link = serializers.CharField(read_only=True)
+    link = LinkField()
 
     class Meta:
         model = SubMenuItem
@@ -18,7 +65,7 @@ class SubMenuItemSerializer(serializers.ModelSerializer):
 
 
 class MenuItemSerializer(serializers.ModelSerializer):
-    link = serializers.CharField(read_only=True)
+    link = LinkField()
     sub_items = SubMenuItemSerializer(many=True, read_only=True)
 
     class Meta:
@@ -28,148 +75,662 @@ class MenuItemSerializer(serializers.ModelSerializer):
 
 class NavigationMenuSerializer(BaseSerializer):
     menu_items = MenuItemSerializer(many=True, read_only=True)
-    link = serializers.CharField(read_only=True)
+    link = LinkField()
 
     class Meta:
         model = NavigationMenu
         fields = ['id', 'title', 'slug', 'link', 'link_url', 'display_order', 'menu_items']
 
 
-class NavigationMenuAPIViewSet(BaseAPIViewSet):
+class JSONRendererMixin:
+    """Renders JSON with the API_JSON_RENDERER class"""
+
+    def get_renderers(self):
+        json_renderer_class = get_json_renderer_class()
+        return [
+            json_renderer_class() if issubclass(renderer_class, JSONRenderer) else renderer_class()
+            for renderer_class in self.renderer_classes
+        ]
+
+
+class ConditionalGetMixin(ABC):
+    """
+    Answers conditional GETs on API endpoints with 304 Not Modified before
+    anything is serialized.
+    """
+
+    @abstractmethod
+    def get_validators(self, request, pk=None):
+        """The ETag and Last-Modified of the response, from cheap lookups only"""
+
+    def listing_view(self, request):
+        etag, last_modified = self.get_validators(request)
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = set_validators(super().listing_view(request), etag, last_modified)
+        return response
+
+    def detail_view(self, request, pk):
+        etag, last_modified = self.get_validators(request, pk)
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = set_validators(super().detail_view(request, pk), etag, last_modified)
+        return response
+
+
+class ListingDocumentMixin(ABC):
+    """
+    Serves listings without parameters from a stored JSON document of every
+    object with the default listing fields, so nothing is loaded or
+    serialized for them. Listings with parameters, or more objects than fit
+    on a page, are served as usual.
+
+    Used with ConditionalGetMixin, whose validators are checked before the
+    document is built.
+    """
+
+    @abstractmethod
+    def get_listing_document(self):
+        """The JSON list of items, their number and whether it was cached"""
+
+    def listing_view(self, request):
+        if set(request.GET) - {'format'} or request.accepted_renderer.format != 'json':
+            return super().listing_view(request)
+
+        # The ETag is the same however the listing is served
+        etag, last_modified = self.get_validators(request)
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        body, count, cache_status = self.get_listing_document()
+        if count > get_limit(request):
+            return super().listing_view(request)
+
+        body = b'{"meta":{"total_count":%d},"items":%s}' % (count, body)
+        return json_response(body, cache_status, etag, last_modified)
+
+
+class StreamingListingMixin:
+    """
+    Streams listings requested with ?stream=true. Items are loaded,
+    serialized and encoded a chunk at a time and sent as they are ready, so
+    memory use does not grow with the number of results.
+
+    Views keep a ReferenceResolver in self.references, which is resolved
+    after each chunk.
+    """
+
+    stream_chunk_size = 100
+
+    def is_streaming(self, request):
+        try:
+            stream = parse_boolean(request.GET.get('stream', 'false'))
+        except ValueError:
+            raise BadRequestError("stream must be a boolean")
+
+        if stream and request.GET.get('order') == 'random':
+            # Every chunk would be drawn at random again
+            raise BadRequestError("random ordering cannot be streamed")
+        if stream and 'cursor' in request.GET:
+            raise BadRequestError("cursor pagination cannot be streamed")
+        # The browsable API renders whole responses
+        return stream and request.accepted_renderer.format == 'json'
+
+    def listing_view(self, request):
+        if not self.is_streaming(request):
+            return super().listing_view(request)
+
+        queryset = self.get_queryset()
+        self.check_query_parameters(queryset)
+        queryset = self.filter_queryset(queryset)
+        queryset = self.paginator.paginate_queryset(queryset, request, view=self)
+        return StreamingHttpResponse(
+            self.stream_listing(queryset, self.paginator.total_count),
+            content_type='application/json',
+        )
+
+    def load_chunk(self, items):
+        """Called with each chunk of items before they are serialized"""
+
+    def stream_listing(self, queryset, total_count):
+        renderer = get_json_renderer_class()()
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+
+        yield b'{"meta":{"total_count":%d},"items":[' % total_count
+        separator = b''
+        for start in count(0, self.stream_chunk_size):
+            items = list(queryset[start:start + self.stream_chunk_size])
+            if not items:
+                break
+
+            self.load_chunk(items)
+            data = serializer_class(items, many=True, context=context).data
+            self.references.resolve()
+            for item in data:
+                yield separator + renderer.render(item)
+                separator = b','
+
+            if len(items) < self.stream_chunk_size:
+                break
+        yield b']}'
+
+
+class NavigationMenuAPIViewSet(JSONRendererMixin, ListingDocumentMixin, ConditionalGetMixin, BaseAPIViewSet):
     model = NavigationMenu
     serializer_class = NavigationMenuSerializer
-    body_fields = ['title', 'slug', 'link', 'link_url', 'display_order', 'menu_items']
-    listing_default_fields = ['id', 'title', 'slug', 'link', 'display_order', 'menu_items']
+    body_fields = BaseAPIViewSet.body_fields + ['title', 'slug', 'link', 'link_url', 'display_order', 'menu_items']
+    listing_default_fields = ['id', 'title', 'slug', 'link', 'link_url', 'display_order', 'menu_items']
+
+    def get_queryset(self):
+        return get_navigation_menus()
+
+    @classmethod
+    def get_field_serializer_overrides(cls, model):
+        overrides = super().get_field_serializer_overrides(model)
+        # Wagtail builds serializers from base_serializer_class, so the links
+        # and items of the menu serializers are brought in here
+        overrides['link'] = LinkField()
+        overrides['menu_items'] = MenuItemSerializer(many=True, read_only=True)
+        return overrides
+
+    def get_listing_document(self):
+        # The materialized tree holds every menu with the listing fields
+        tree, cache_status = get_navigation_tree()
+        return tree.body, tree.count, cache_status
+
+    def get_validators(self, request, pk=None):
+        # Menus and their linked pages bump the navigation version when they
+        # change, and the tree is built for one version
+        tree, cache_status = get_navigation_tree()
+        etag = make_etag('navigation-menus', tree.version, request.accepted_renderer.format)
+        return etag, tree.built_at
+
+
+class PlannedField(Field):
+    """
+    A field written by its model's SnippetPlan. PlannedSerializer writes it
+    straight into the output, so images and rich text registered with the
+    view's ReferenceResolver are filled in where they belong.
+    """
+
+    def __init__(self, write, **kwargs):
+        self.write = write
+        super().__init__(source='*', read_only=True, **kwargs)
+
+    def to_representation(self, obj):
+        # Written by PlannedSerializer
+        return None
+
+
+class PlannedSerializer(BaseSerializer):
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for field in self._readable_fields:
+            if isinstance(field, PlannedField):
+                field.write(instance, data, self.context['references'])
+        return data
+
+
+class SnippetAPIViewSet(JSONRendererMixin, ListingDocumentMixin, ConditionalGetMixin, BaseAPIViewSet):
+    """
+    Endpoint for a snippet model, serialized from its api_fields with a
+    SnippetPlan, the same way as the snippet documents of mysite.snippets.
+
+    Objects are loaded with everything the plan needs, and the images, pages
+    and rich text of the whole response are loaded in bulk. Plain listings
+    are cached as a document for the content version and the version of the
+    model's snippet group, which make up the ETag too.
+    """
+
+    base_serializer_class = PlannedSerializer
+    # ReferenceResolver serializers by model, for pages chosen in StreamFields
+    reference_serializers = None
+
+    # SnippetPlan of each model, built once per process
+    _plans = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.references = ReferenceResolver(serializers=self.reference_serializers)
+
+    @classmethod
+    def get_plan(cls, model):
+        if model not in cls._plans:
+            cls._plans[model] = SnippetPlan(model)
+        return cls._plans[model]
+
+    @classmethod
+    def get_listing_default_fields(cls, model):
+        return ['id'] + [name for name, write in cls.get_plan(model).fields]
+
+    @classmethod
+    def get_field_serializer_overrides(cls, model):
+        overrides = super().get_field_serializer_overrides(model)
+        for name, write in cls.get_plan(model).fields:
+            overrides[name] = PlannedField(write)
+        return overrides
 
     def get_queryset(self):
-        return NavigationMenu.objects.all().prefetch_related('menu_items__sub_items')
+        return self.get_plan(self.model).get_queryset().order_by(*self.model._meta.ordering or ['pk'])
+
+    def listing_view(self, request):
+        response = super().listing_view(request)
+        self.references.resolve()
+        return response
+
+    def detail_view(self, request, pk):
+        response = super().detail_view(request, pk)
+        self.references.resolve()
+        return response
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['references'] = self.references
+        return context
+
+    def get_versions(self):
+        # Snippets link to pages and images, so they depend on the content
+        # version as well as their own
+        return get_content_version(), get_snippet_version(get_snippet_group(self.model))
+
+    def get_listing_document(self):
+        cache_key = 'api:%s:%s:%s' % (self.name, *self.get_versions())
+        document = cache.get(cache_key)
+        if document is not None:
+            return document + ('HIT',)
+
+        references = ReferenceResolver(serializers=self.reference_serializers)
+        plan = self.get_plan(self.model)
+        items = [plan.serialize_object(obj, references) for obj in self.get_queryset()]
+        references.resolve()
+        document = (render_json(items), len(items))
+        cache.set(cache_key, document, settings.API_SNIPPET_CACHE_TIMEOUT)
+        return document + ('MISS',)
+
+    def get_validators(self, request, pk=None):
+        # Snippets have no modification time of their own
+        return make_etag(self.name, *self.get_versions(), request.accepted_renderer.format), None
+
+
+class MegaMenuAPIViewSet(SnippetAPIViewSet):
+    name = 'mega_menus'
+    model = MegaMenu
+    # Chosen pages are written as links
+    reference_serializers = PAGE_LINK_SERIALIZERS
+
+
+class FooterAPIViewSet(SnippetAPIViewSet):
+    name = 'footers'
+    model = Footer
+
+
+class FAQCollectionAPIViewSet(SnippetAPIViewSet):
+    """FAQ collections, loaded with their items and the items' categories"""
+
+    name = 'faq_collections'
+    model = FAQCollection
+
+
+class TeamMemberAPIViewSet(SnippetAPIViewSet):
+    """
+    Team members, filtered with ?is_active=, ?is_featured=, ?is_author=,
+    ?department= and ?role=, or found by author slug with
+    /team_members/find/?author_slug=...
+
+    Listings show active members only unless ?is_active= is given, as the
+    team document does.
+    """
+
+    name = 'team_members'
+    model = TeamMember
+    filter_backends = [FieldsFilter, OrderingFilter]
+    find_query_parameters = BaseAPIViewSet.find_query_parameters.union(['author_slug'])
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'listing_view' and 'is_active' not in self.request.GET:
+            queryset = queryset.filter(is_active=True)
+        return queryset
+
+    def find_object(self, queryset, request):
+        if 'author_slug' in request.GET:
+            return queryset.filter(is_author=True, author_slug=request.GET['author_slug']).first()
+        return super().find_object(queryset, request)
+
+
+class SnapshotValue:
+    """A field value as stored in a page's snapshot"""
+
+    def __init__(self, data):
+        self.data = data
 
 
 class StreamFieldSerializer(Field):
     """Custom serializer for StreamField that returns JSON instead of HTML"""
+    def get_attribute(self, instance):
+        # Serialized already if the view found a snapshot of the live revision
+        snapshot = self.context.get('snapshots', {}).get(instance.pk)
+        if snapshot is not None and self.field_name in snapshot:
+            return SnapshotValue(snapshot[self.field_name])
+        return super().get_attribute(instance)
+
     def to_representation(self, value):
-        # Convert StreamField to list of dicts
-        result = []
-        for block in value:
-            result.append({
-                'type': block.block_type,
-                'value': self._serialize_block_value(block.value),
-                'id': str(block.id) if hasattr(block, 'id') else None
-            })
-        return result
-
-    def _serialize_block_value(self, value):
-        """Serialize a block's value"""
-        # Handle StructValue
-        if hasattr(value, 'items'):
-            return self._serialize_struct_block(value)
-        # Handle basic types
-        elif isinstance(value, (str, int, float, bool, type(None))):
-            return value
-        # Handle lists
-        elif isinstance(value, (list, tuple)):
-            return [self._serialize_block_value(item) for item in value]
-        # Default
-        else:
-            return self._serialize_value(value)
-
-    def _serialize_struct_block(self, struct_value):
-        """Recursively serialize StructBlock values"""
-        result = {}
-        for key, val in struct_value.items():
-            result[key] = self._serialize_value(val)
-        return result
-
-    def _serialize_value(self, value):
-        """Serialize individual values"""
-        from wagtail.rich_text import RichText
-        from wagtail.images.models import Image
-        from wagtail.blocks.stream_block import StreamValue
-        from wagtail.blocks.list_block import ListValue
-        from datetime import date, datetime
-
-        # Handle None
-        if value is None:
-            return None
-
-        # Handle basic types first
-        if isinstance(value, (str, int, float, bool)):
-            return value
-
-        # Handle ListValue (from ListBlock) - must come before list/tuple check
-        if isinstance(value, ListValue):
-            return [self._serialize_value(item) for item in value]
-
-        # Handle StructValue (nested blocks) - check for items() method
-        if hasattr(value, 'items') and callable(value.items):
-            return self._serialize_struct_block(value)
-
-        # Handle StreamValue (nested StreamField)
-        if isinstance(value, StreamValue):
-            return self.to_representation(value)
-
-        # Handle regular lists/tuples
-        if isinstance(value, (list, tuple)):
-            return [self._serialize_value(item) for item in value]
-
-        # Handle RichText
-        if isinstance(value, RichText):
-            return str(value)
-
-        # Handle Images
-        if isinstance(value, Image):
-            return {
-                'id': value.id,
-                'title': value.title,
-                'url': value.file.url,
-                'width': value.width,
-                'height': value.height,
-            }
-
-        # Handle dates
-        if isinstance(value, (date, datetime)):
-            return value.isoformat()
-
-        # Default: convert to string
-        return str(value)
-
-
-class CustomPagesAPIViewSet(PagesAPIViewSet):
+        if isinstance(value, SnapshotValue):
+            return value.data
+
+        references = self.context.get('references')
+        if references is not None:
+            # The view resolves references once the whole response is built
+            return serialize_stream_field(value, references)
+
+        references = ReferenceResolver()
+        data = serialize_stream_field(value, references)
+        references.resolve()
+        return data
+
+
+class BreadcrumbsField(Field):
+    """Breadcrumbs of a page, from one query rather than its get_breadcrumbs()"""
+
+    def __init__(self, **kwargs):
+        super().__init__(source='*', read_only=True, **kwargs)
+
+    def to_representation(self, page):
+        return get_breadcrumbs(page)
+
+
+class SerializerRegistry:
+    """
+    Per-process registry of API serializer classes.
+
+    Wagtail builds a brand new serializer class for every request. The registry
+    builds it once per (page type, detail/listing, fields parameter) and reuses
+    it afterwards. StreamField names are read from each model's _meta once, so
+    no field values have to be loaded to find them.
+    """
+
+    # Upper bound on cached serializer classes, as the fields parameter is user input
+    max_size = 512
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stream_fields = {}
+        self._serializers = {}
+
+    def get_stream_field_names(self, model):
+        """Return the names of the StreamFields declared on the model"""
+        try:
+            return self._stream_fields[model]
+        except KeyError:
+            pass
+
+        names = frozenset(
+            field.name for field in model._meta.get_fields()
+            if isinstance(field, StreamField)
+        )
+        with self._lock:
+            return self._stream_fields.setdefault(model, names)
+
+    def get_serializer_class(self, key, build):
+        """Return the serializer class cached under key, calling build() on a miss"""
+        serializer_class = self._serializers.get(key)
+        if serializer_class is not None:
+            return serializer_class
+
+        with self._lock:
+            serializer_class = self._serializers.get(key)
+            if serializer_class is None:
+                serializer_class = build()
+                if len(self._serializers) < self.max_size:
+                    self._serializers[key] = serializer_class
+        return serializer_class
+
+    def clear(self):
+        with self._lock:
+            self._stream_fields.clear()
+            self._serializers.clear()
+
+
+serializer_registry = SerializerRegistry()
+
+
+class CustomPagesAPIViewSet(JSONRendererMixin, ConditionalGetMixin, StreamingListingMixin, PagesAPIViewSet):
     """Custom Pages API that properly serializes StreamFields"""
 
+    known_query_parameters = PagesAPIViewSet.known_query_parameters.union(['stream', 'cursor'])
+    # Offset pagination, or keyset pagination with ?cursor
+    pagination_class = PagesPagination
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Images, pages and rich text referenced from StreamFields anywhere in
+        # the response, loaded in bulk once every item has been serialized
+        self.references = ReferenceResolver()
+        # Snapshot payloads of the pages in the response, by page id
+        self.snapshots = {}
+
+    def listing_view(self, request):
+        response = super().listing_view(request)
+        self.references.resolve()
+        return response
+
+    def detail_view(self, request, pk):
+        response = super().detail_view(request, pk)
+        self.references.resolve()
+        return response
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['references'] = self.references
+        context['snapshots'] = self.snapshots
+        return context
+
+    def filter_queryset(self, queryset):
+        if 'cursor' not in self.request.GET:
+            return super().filter_queryset(queryset)
+
+        if 'search' in self.request.GET:
+            # Search results are ordered by relevance, which has no keyset
+            raise BadRequestError("search results cannot be paginated with a cursor")
+
+        # The order is part of the cursor, and applied by the paginator
+        for backend in self.filter_backends:
+            if backend is not OrderingFilter:
+                queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    def load_snapshots(self, pages, serializer_class):
+        # Snapshots only save serializing StreamFields
+        if not any(isinstance(field, StreamFieldSerializer) for field in serializer_class._declared_fields.values()):
+            return
+
+        page_ids = [page.pk for page in pages if page.pk not in self.snapshots]
+        if page_ids:
+            # None marks pages looked up without a snapshot
+            self.snapshots.update(dict.fromkeys(page_ids))
+            self.snapshots.update(get_snapshot_data(page_ids))
+
+    def paginate_queryset(self, queryset):
+        pages = list(super().paginate_queryset(queryset))
+        self.load_snapshots(pages, self.get_serializer_class())
+        return pages
+
+    def load_chunk(self, pages):
+        # Only the current chunk's snapshots are kept while streaming
+        self.snapshots.clear()
+        self.load_snapshots(pages, self.get_serializer_class())
+
+    def get_object(self):
+        page = super().get_object()
+        self.load_snapshots([page], self.get_model_serializer_class(type(page), show_details=True))
+        return page
+
+    def get_validators(self, request, pk=None):
+        # Every publish, unpublish, move or delete bumps the content version
+        parts = ['pages', get_content_version(), request.accepted_renderer.format]
+        last_modified = get_content_modified()
+        if pk is not None:
+            page = Page.objects.filter(pk=pk).values('live_revision_id', 'last_published_at').first()
+            if page is not None:
+                parts += [page['live_revision_id'], page['last_published_at']]
+                last_modified = latest(page['last_published_at'], last_modified)
+        return make_etag(*parts), last_modified
+
+    @classmethod
+    def get_field_serializer_overrides(cls, model):
+        overrides = super().get_field_serializer_overrides(model)
+        # Replace StreamField serialization
+        for field_name in serializer_registry.get_stream_field_names(model):
+            overrides[field_name] = StreamFieldSerializer(read_only=True)
+        if any(field.name == 'breadcrumbs' for field in getattr(model, 'api_fields', [])):
+            overrides['breadcrumbs'] = BreadcrumbsField()
+        return overrides
+
     def get_serializer_class(self):
-        # Get the default serializer class
-        serializer_class = super().get_serializer_class()
-
-        # Override StreamField serialization
-        original_get_fields = serializer_class.get_fields
-
-        def get_fields(self):
-            fields = original_get_fields(self)
-            # Replace StreamField serialization
-            for field_name in list(fields.keys()):
-                if hasattr(self.instance, field_name):
-                    field_value = getattr(self.instance, field_name)
-                    if hasattr(field_value, 'stream_block'):  # It's a StreamField
-                        fields[field_name] = StreamFieldSerializer(source=field_name)
-            return fields
-
-        serializer_class.get_fields = get_fields
-        return serializer_class
+        if self.action == "listing_view":
+            return self.get_model_serializer_class(self.get_queryset().model, show_details=False)
+        return self.get_model_serializer_class(type(self.get_object()), show_details=True)
+
+    def get_model_serializer_class(self, model, show_details):
+        key = (model, show_details, self.request.GET.get("fields", ""))
+        return serializer_registry.get_serializer_class(
+            key, lambda: self._build_serializer_class(model, show_details)
+        )
+
+    def _build_serializer_class(self, model, show_details):
+        if "fields" in self.request.GET:
+            try:
+                fields_config = parse_fields_parameter(self.request.GET["fields"])
+            except ValueError as e:
+                raise BadRequestError("fields error: %s" % str(e))
+        else:
+            fields_config = []
+
+        return self._get_serializer_class(
+            self.request.wagtailapi_router,
+            model,
+            fields_config,
+            show_details=show_details,
+        )
 
 
 api_router = WagtailAPIRouter('wagtailapi')
 api_router.register_endpoint('pages', CustomPagesAPIViewSet)
 api_router.register_endpoint('navigation_menus', NavigationMenuAPIViewSet)
+api_router.register_endpoint('mega_menus', MegaMenuAPIViewSet)
+api_router.register_endpoint('footers', FooterAPIViewSet)
+api_router.register_endpoint('faq_collections', FAQCollectionAPIViewSet)
+api_router.register_endpoint('team_members', TeamMemberAPIViewSet)
+
+
+page_cache_stats = get_cache_stats('page-by-slug')
+bundle_cache_stats = get_cache_stats('bundle-parts')
+
+
+def get_page_version(site, page):
+    """
+    Values that identify the published payload of page, as served on site.
+
+    The revision and publish time change whenever the page itself is
+    published; the content version changes whenever any page is published,
+    unpublished, moved or deleted, which covers breadcrumbs and URLs.
+    has_unpublished_changes is in the payload and set by saving a draft.
+    """
+    last_published_at = page.last_published_at.timestamp() if page.last_published_at else ''
+    return (
+        get_content_version(),
+        site.id if site else '',
+        page.slug,
+        page.id,
+        page.live_revision_id or '',
+        last_published_at,
+        int(page.has_unpublished_changes),
+    )
+
+
+def get_page_cache_key(page_version):
+    return 'api:page-by-slug:' + ':'.join(str(part) for part in page_version)
+
+
+def get_page_body(page, page_version, fields=None):
+    """
+    The page_by_slug payload of page, with all fields or only the given
+    ones, and whether it was cached
+    """
+    # Serve the stored JSON if this version of the page has been built before
+    cache_key = get_page_cache_key(page_version)
+    if fields is not None:
+        cache_key += ':' + ','.join(sorted(fields))
+    body = cache.get(cache_key)
+    if body is not None:
+        page_cache_stats.hit()
+        return body, 'HIT'
+    page_cache_stats.miss()
+
+    # Published pages are rendered when they are published, so only pages
+    # without a snapshot of their live revision are serialized here.
+    # Snapshots hold every field, so they are no use for a few of them
+    body = get_snapshot_body(page) if fields is None else None
+    if body is None:
+        body = render_page(load_page(page, fields), fields=fields)
+
+    cache.set(cache_key, body, settings.API_PAGE_CACHE_TIMEOUT)
+    return body, 'MISS'
+
+
+def get_part_cache_key(name, *version):
+    digest = hashlib.md5(':'.join(str(part) for part in version).encode(), usedforsecurity=False)
+    return 'api:bundle:%s:%s' % (name, digest.hexdigest())
+
+
+def get_bundle_parts(parts):
+    """
+    Rendered JSON of each (name, cache key, build) part, from the cache or
+    built with build(references). Returns {name: (body, cache status)}.
+    """
+    cached = cache.get_many([key for name, key, build in parts])
+
+    bodies = {}
+    built = []
+    # Images and rich text of every part that is built are loaded together
+    references = ReferenceResolver()
+    for name, key, build in parts:
+        if key in cached:
+            bundle_cache_stats.hit()
+            bodies[name] = (cached[key], 'HIT')
+        else:
+            bundle_cache_stats.miss()
+            built.append((name, key, build(references)))
+    references.resolve()
+
+    if built:
+        new_bodies = {}
+        for name, key, data in built:
+            # Renderers return nothing at all for None
+            body = b'null' if data is None else render_json(data)
+            bodies[name] = (body, 'MISS')
+            new_bodies[key] = body
+        cache.set_many(new_bodies, settings.API_SNIPPET_CACHE_TIMEOUT)
+    return bodies
+
+
+def json_response(body, cache_status, etag, last_modified):
+    response = HttpResponse(body, content_type='application/json')
+    response['X-Cache'] = cache_status
+    return set_validators(response, etag, last_modified)
 
 
 @api_view(['GET'])
 def page_by_slug(request):
     """
-    API endpoint to get a page by slug with all fields.
+    API endpoint to get a page by slug with all fields, or only some of them.
     Usage: /api/v2/page-by-slug/?slug=about-us
+           /api/v2/page-by-slug/?slug=about-us&fields=title,seo_title
     """
     slug = request.GET.get('slug')
+    fields = request.GET.get('fields')
 
     if not slug:
         return Response(
@@ -187,90 +748,163 @@ def page_by_slug(request):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Get the specific page type instance
-        page = page.specific
-
-        # Build response with all fields
-        data = {
-            'id': page.id,
-            'title': page.title,
-            'slug': page.slug,
-            'url_path': page.url_path,
-            'seo_title': page.seo_title,
-            'search_description': page.search_description,
-            'live': page.live,
-            'has_unpublished_changes': page.has_unpublished_changes,
-            'first_published_at': page.first_published_at,
-            'last_published_at': page.last_published_at,
-        }
-
-        # Add breadcrumbs
-        if hasattr(page, 'get_breadcrumbs'):
-            data['breadcrumbs'] = page.get_breadcrumbs()
-        else:
-            # Default breadcrumbs implementation for all pages
-            breadcrumbs = []
-            for ancestor in page.get_ancestors(inclusive=False).live().public():
-                breadcrumbs.append({
-                    'title': ancestor.title,
-                    'url': ancestor.url,
-                    'slug': ancestor.slug,
-                })
-            breadcrumbs.append({
-                'title': page.title,
-                'url': page.url,
-                'slug': page.slug,
-            })
-            data['breadcrumbs'] = breadcrumbs
-
-        # Helper function to serialize field values
-        def serialize_field_value(field_value):
-            from wagtail.rich_text import RichText
-            from wagtail.images.models import Image
-            from datetime import date, datetime
-
-            # Handle StreamField
-            if hasattr(field_value, 'stream_block'):
-                serializer = StreamFieldSerializer()
-                return serializer.to_representation(field_value)
-
-            # Handle RichText
-            if isinstance(field_value, RichText):
-                return str(field_value)
-
-            # Handle Images
-            if isinstance(field_value, Image):
-                return {
-                    'id': field_value.id,
-                    'title': field_value.title,
-                    'url': field_value.file.url,
-                    'width': field_value.width,
-                    'height': field_value.height,
-                }
-
-            # Handle dates
-            if isinstance(field_value, (date, datetime)):
-                return field_value.isoformat()
-
-            return field_value
-
-        # Add any other custom fields from the specific page model
-        for field in page._meta.get_fields():
-            field_name = field.name
-            # Skip some fields to avoid recursion and redundant data
-            if field_name not in data and not field_name.startswith('_') and field_name not in ['page_ptr', 'content_type']:
-                try:
-                    field_value = getattr(page, field_name, None)
-                    # Convert to serializable format
-                    if field_value is not None and not callable(field_value):
-                        serialized_value = serialize_field_value(field_value)
-                        if not isinstance(serialized_value, (str, int, bool, float, list, dict, type(None))):
-                            serialized_value = str(serialized_value)
-                        data[field_name] = serialized_value
-                except Exception:
-                    pass
-
-        return Response(data)
+        if fields is not None:
+            fields = frozenset(name.strip() for name in fields.split(',') if name.strip())
+            unknown = fields - get_page_field_names(page.specific_class or type(page))
+            if unknown:
+                return Response(
+                    {'error': 'unknown fields: %s' % ', '.join(sorted(unknown))},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        page_version = get_page_version(Site.find_for_request(request), page)
+
+        # Nothing to send if the client has this version already
+        etag = make_etag('page-by-slug', *page_version, *sorted(fields or []))
+        last_modified = latest(page.last_published_at, get_content_modified())
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        body, cache_status = get_page_body(page, page_version, fields)
+        return json_response(body, cache_status, etag, last_modified)
+
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def snippet_document_response(request, name, group, build):
+    """
+    Response with the document built by build(references), cached for the
+    content version and the version of the snippet group, which make up the
+    ETag too
+    """
+    versions = (get_content_version(), get_snippet_version(group))
+
+    # Nothing to send if the client has this version already
+    etag = make_etag(name, *versions)
+    not_modified = conditional_response(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    bodies = get_bundle_parts([(name, get_part_cache_key(name, *versions), build)])
+    return json_response(*bodies[name], etag, None)
+
+
+@api_view(['GET'])
+def faq(request):
+    """
+    API endpoint to get the published FAQ items grouped by category, and the
+    items without a category.
+    Usage: /api/v2/faq/
+    """
+    try:
+        return snippet_document_response(request, 'faq', 'faq', serialize_faq_categories)
+
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+def category_tree(request):
+    """
+    API endpoint to get the tree of active categories, each with its
+    children.
+    Usage: /api/v2/category-tree/
+    """
+    try:
+        return snippet_document_response(request, 'category-tree', 'category', serialize_category_tree)
+
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+def bundle(request):
+    """
+    API endpoint to get a page by slug together with the navigation menus,
+    the active footer and, optionally, FAQ collections by title.
+    Usage: /api/v2/bundle/?slug=about-us&faq_collection=Product%20FAQs
+    """
+    slug = request.GET.get('slug')
+    # Each title once, in the order given
+    faq_titles = list(dict.fromkeys(request.GET.getlist('faq_collection')))
+
+    if not slug:
+        return Response(
+            {'error': 'slug parameter is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        page = Page.objects.filter(slug=slug).live().first()
+
+        if not page:
+            return Response(
+                {'error': f'Page with slug "{slug}" not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        page_version = get_page_version(Site.find_for_request(request), page)
+        content_version = page_version[0]
+        navigation_version = get_snippet_version('navigation')
+        footer_version = get_snippet_version('footer')
+        faq_version = get_snippet_version('faq')
+
+        # Nothing to send if the client has this version already
+        etag = make_etag(
+            'bundle', *page_version, navigation_version, footer_version, faq_version, *faq_titles
+        )
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        parts = [
+            (
+                'footer',
+                get_part_cache_key('footer', content_version, footer_version),
+                serialize_active_footer,
+            ),
+        ] + [
+            (
+                ('faq_collection', title),
+                get_part_cache_key('faq-collection', content_version, faq_version, title),
+                partial(serialize_faq_collection, title),
+            )
+            for title in faq_titles
+        ]
+
+        page_body, page_cache_status = get_page_body(page, page_version)
+        # The navigation tree is materialized on its own
+        navigation_tree, navigation_cache_status = get_navigation_tree()
+        bodies = get_bundle_parts(parts)
+        bodies['navigation_menus'] = (navigation_tree.body, navigation_cache_status)
+
+        faq_collections = b','.join(
+            render_json(title) + b':' + bodies[('faq_collection', title)][0] for title in faq_titles
+        )
+        body = b''.join([
+            b'{"page":', page_body,
+            b',"navigation_menus":', bodies['navigation_menus'][0],
+            b',"footer":', bodies['footer'][0],
+            b',"faq_collections":{', faq_collections, b'}}',
+        ])
+
+        cache_status = ', '.join(
+            ['page=%s' % page_cache_status]
+            + ['%s=%s' % (name, bodies[name][1]) for name in ['navigation_menus', 'footer']]
+            + ['faq_collection=%s' % bodies[('faq_collection', title)][1] for title in faq_titles]
+        )
+        return json_response(body, cache_status, etag, None)
 
     except Exception as e:
         return Response(
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class MysiteConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'mysite'
+
+    def ready(self):
+        from .page_plans import page_plans
+        from .signal_handlers import register_signal_handlers
+
+        register_signal_handlers()
+        page_plans.build_all()
@@ -0,0 +1,107 @@
+"""
+Breadcrumbs for API payloads.
+
+All ancestors of a page are loaded with one query on the treebeard path
+prefixes of the page's own path, and their URLs are worked out from a
+per-process copy of the site root paths rather than by each ancestor. The
+ancestor part of the trail is memoized per content version, so a page
+only costs a query the first time its trail is built after a change.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from django.urls import NoReverseMatch, reverse
+from wagtail.coreutils import WAGTAIL_APPEND_SLASH
+from wagtail.models import Page, PageViewRestriction, Site
+
+from mysite.cache import get_content_version
+
+
+class SiteRootMap:
+    """
+    Per-process copy of Site.get_site_root_paths(), refreshed whenever the
+    content version changes (sites are saved, pages moved or published).
+    """
+
+    def __init__(self):
+        self._state = (None, (), 0)
+
+    def get_root_paths(self):
+        version = get_content_version()
+        state = self._state
+        if state[0] != version:
+            root_paths = tuple(Site.get_site_root_paths())
+            num_sites = len({root_path.site_id for root_path in root_paths})
+            state = self._state = (version, root_paths, num_sites)
+        return state[1], state[2]
+
+    def get_url(self, url_path):
+        """
+        The URL of the page at url_path, as Page.get_url() would return it
+        without a request. None if no site serves the page.
+        """
+        root_paths, num_sites = self.get_root_paths()
+        for site_id, root_path, root_url, language_code in root_paths:
+            if url_path.startswith(root_path):
+                break
+        else:
+            return None
+
+        try:
+            page_path = reverse('wagtail_serve', args=(url_path[len(root_path):],))
+        except NoReverseMatch:
+            return None
+
+        if not WAGTAIL_APPEND_SLASH and page_path != '/':
+            page_path = page_path.rstrip('/')
+
+        if num_sites == 1:
+            # Only one site, so a local URL is enough
+            return page_path
+        return root_url + page_path
+
+    def clear(self):
+        self._state = (None, (), 0)
+
+
+site_root_map = SiteRootMap()
+
+
+def get_ancestor_breadcrumbs(path):
+    """Breadcrumbs for the live, public ancestors of the page at path"""
+    ancestor_paths = [path[:end] for end in range(Page.steplen, len(path), Page.steplen)]
+    ancestors = (
+        Page.objects
+        .filter(path__in=ancestor_paths)
+        .annotate(restricted=Exists(PageViewRestriction.objects.filter(page=OuterRef('pk'))))
+        .order_by('path')
+        .values_list('title', 'slug', 'url_path', 'live', 'restricted')
+    )
+
+    breadcrumbs = []
+    private = False
+    for title, slug, url_path, live, restricted in ancestors:
+        # A view restriction applies to the page and everything below it
+        private = private or restricted
+        if live and not private:
+            breadcrumbs.append({
+                'title': title,
+                'url': site_root_map.get_url(url_path),
+                'slug': slug,
+            })
+    return breadcrumbs
+
+
+def get_breadcrumbs(page):
+    """Return the breadcrumb trail for page, ending with the page itself"""
+    key = 'api:breadcrumbs:%s:%s' % (get_content_version(), page.path)
+    ancestors = cache.get(key)
+    if ancestors is None:
+        ancestors = get_ancestor_breadcrumbs(page.path)
+        cache.set(key, ancestors, settings.API_PAGE_CACHE_TIMEOUT)
+
+    return ancestors + [{
+        'title': page.title,
+        'url': site_root_map.get_url(page.url_path),
+        'slug': page.slug,
+    }]
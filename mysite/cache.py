@@ -0,0 +1,139 @@
+"""
+Caching of API responses.
+
+Cache keys include a content version that is bumped whenever published
+content changes (see mysite.signal_handlers). Bumping it orphans every
+cached response at once, which also covers changes that leak into other
+pages' payloads, such as an ancestor's title in breadcrumbs. Snippets have
+versions of their own, per group of models.
+
+Versions are read from the cache once per request and remembered until it
+finishes, as building a response reads them for every link and document.
+"""
+import time
+
+from asgiref.local import Local
+from django.core.cache import cache
+from django.utils import timezone
+
+
+CONTENT_VERSION_KEY = 'api:content-version'
+CONTENT_MODIFIED_KEY = 'api:content-modified'
+SNIPPET_VERSION_KEY = 'api:snippet-version:%s'
+
+# {key: version} of the versions read by the current request, or None
+# outside requests, when every read goes to the cache
+_request_versions = Local()
+
+
+def start_request(**kwargs):
+    _request_versions.versions = {}
+
+
+def finish_request(**kwargs):
+    _request_versions.versions = None
+
+
+def _get_version(key):
+    versions = getattr(_request_versions, 'versions', None)
+    if versions is not None and key in versions:
+        return versions[key]
+
+    version = cache.get(key)
+    if version is None:
+        # Start from the current time, so a version that was evicted from the
+        # cache never comes back with the same value
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    if versions is not None:
+        versions[key] = version
+    return version
+
+
+def _bump_version(key):
+    # Read again by the request that bumped it
+    versions = getattr(_request_versions, 'versions', None)
+    if versions is not None:
+        versions.pop(key, None)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Not in the cache (any more), so nothing can be cached under it
+        _get_version(key)
+
+
+def get_content_version():
+    return _get_version(CONTENT_VERSION_KEY)
+
+
+def bump_content_version():
+    _bump_version(CONTENT_VERSION_KEY)
+    cache.set(CONTENT_MODIFIED_KEY, timezone.now(), timeout=None)
+
+
+def get_content_modified():
+    """When the content version was last bumped, or None if unknown"""
+    return cache.get(CONTENT_MODIFIED_KEY)
+
+
+def get_snippet_version(name):
+    """
+    Version of a group of snippets, such as "footer", bumped whenever one of
+    them is saved or deleted. Snippets are not published, so they do not
+    change the content version.
+    """
+    return _get_version(SNIPPET_VERSION_KEY % name)
+
+
+def bump_snippet_version(name):
+    _bump_version(SNIPPET_VERSION_KEY % name)
+
+
+class CacheStats:
+    """
+    Hit and miss counters for a cache, kept in the cache itself so they add up
+    across the processes sharing it (see CACHES).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.hits_key = 'api:stats:%s:hits' % name
+        self.misses_key = 'api:stats:%s:misses' % name
+
+    def _incr(self, key):
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, timeout=None):
+                cache.incr(key)
+
+    def hit(self):
+        self._incr(self.hits_key)
+
+    def miss(self):
+        self._incr(self.misses_key)
+
+    def get(self):
+        hits = cache.get(self.hits_key, 0)
+        misses = cache.get(self.misses_key, 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else None,
+        }
+
+    def reset(self):
+        cache.delete_many([self.hits_key, self.misses_key])
+
+
+# Every CacheStats instance, by name
+cache_stats = {}
+
+
+def get_cache_stats(name):
+    if name not in cache_stats:
+        cache_stats[name] = CacheStats(name)
+    return cache_stats[name]
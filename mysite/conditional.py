@@ -0,0 +1,51 @@
+"""
+Conditional GET for API responses.
+
+Views work out an ETag and Last-Modified from cheap lookups (the content
+version, publish times, snippet updated_at) and call conditional_response()
+before serializing anything, so an unchanged resource costs no more than
+those lookups.
+"""
+import hashlib
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """A strong ETag from the values the representation depends on"""
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode(), usedforsecurity=False)
+    return '"%s"' % digest.hexdigest()
+
+
+def latest(*datetimes):
+    """The most recent of datetimes, ignoring None"""
+    datetimes = [value for value in datetimes if value is not None]
+    return max(datetimes) if datetimes else None
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    Return a 304 (or 412) response if the request's If-None-Match or
+    If-Modified-Since headers show the client's copy is current, else None.
+    """
+    # The 304 copies its ETag and Last-Modified headers from this response,
+    # which Django hands back unchanged when the preconditions pass
+    validators = set_validators(HttpResponse(), etag, last_modified)
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None,
+        response=validators,
+    )
+    if response is validators:
+        return None
+    return response
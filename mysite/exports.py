@@ -0,0 +1,168 @@
+"""
+Static JSON export of the API, for serving from a CDN.
+
+Layout of the output directory:
+
+    pages/<slug>.json       page_by_slug payload of every live page
+    navigation_menus.json   all navigation menus with their items
+    footers.json            all footers
+    faq.json                published FAQ items by category, and collections
+    team.json               active team members, departments and roles
+    manifest.json           the exported pages, for incremental exports
+
+Pages are exported in batches by a pool of worker processes. The manifest
+records each page's last_published_at and url_path, and later exports
+only write the pages where either changed, and delete the files of pages
+that are no longer live. The other files are small and always written.
+"""
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+from wagtail.models import Page
+
+from mysite.models import PageSnapshot
+from mysite.page_plans import load_page, render_page
+from mysite.renderers import render_json
+from mysite.snippets import serialize_faq, serialize_footers, serialize_navigation_menus, serialize_team
+from mysite.streamfield import ReferenceResolver
+
+
+MANIFEST_NAME = 'manifest.json'
+PAGES_DIR = 'pages'
+
+# Pages exported by each worker task
+PAGE_BATCH_SIZE = 200
+
+
+def write_file(path, body):
+    """Write body to path atomically, so the CDN never serves half a file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(body)
+    os.replace(temp_path, path)
+
+
+def get_page_path(output_dir, slug):
+    return os.path.join(output_dir, PAGES_DIR, slug + '.json')
+
+
+def read_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def get_live_pages():
+    """
+    {slug: manifest entry} of the pages page_by_slug serves. Where live
+    pages share a slug, page_by_slug serves the first in tree order.
+    """
+    pages = OrderedDict()
+    queryset = (
+        Page.objects.live().exclude(depth=1).order_by('path')
+        .values_list('slug', 'pk', 'last_published_at', 'url_path')
+    )
+    for slug, pk, last_published_at, url_path in queryset:
+        if slug not in pages:
+            pages[slug] = {
+                'id': pk,
+                'last_published_at': last_published_at.isoformat() if last_published_at else None,
+                'url_path': url_path,
+            }
+    return pages
+
+
+def export_pages(page_ids, output_dir):
+    """Write the page_by_slug payloads of the pages, returning their slugs"""
+    # Published pages are stored as snapshots already
+    snapshots = dict(
+        PageSnapshot.objects
+        .filter(page_id__in=page_ids, revision_id=F('page__live_revision_id'))
+        .values_list('page_id', 'body')
+    )
+
+    slugs = []
+    for page in Page.objects.filter(pk__in=page_ids):
+        body = snapshots.get(page.pk)
+        body = render_page(load_page(page)) if body is None else bytes(body)
+        write_file(get_page_path(output_dir, page.slug), body)
+        slugs.append(page.slug)
+    return slugs
+
+
+def init_worker():
+    """Set up Django in worker processes that were not forked from a set up one"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+# File name and builder of the exported snippet data
+SNIPPET_EXPORTS = [
+    ('navigation_menus.json', serialize_navigation_menus),
+    ('footers.json', serialize_footers),
+    ('faq.json', serialize_faq),
+    ('team.json', serialize_team),
+]
+
+
+def export_snippets(output_dir):
+    """Write the snippet files, returning their names"""
+    names = []
+    for name, serialize in SNIPPET_EXPORTS:
+        references = ReferenceResolver()
+        data = serialize(references)
+        references.resolve()
+        write_file(os.path.join(output_dir, name), render_json(data))
+        names.append(name)
+    return names
+
+
+def export_api(output_dir, full=False, workers=1):
+    """
+    Export the API to output_dir. Unless full is set, only pages that
+    changed since the manifest was written are exported again.
+
+    Returns the number of pages written, left as they were and removed.
+    """
+    manifest = None if full else read_manifest(output_dir)
+    exported = manifest['pages'] if manifest else {}
+    pages = get_live_pages()
+
+    changed = [entry['id'] for slug, entry in pages.items() if exported.get(slug) != entry]
+    removed = [slug for slug in exported if slug not in pages]
+
+    batches = [changed[start:start + PAGE_BATCH_SIZE] for start in range(0, len(changed), PAGE_BATCH_SIZE)]
+    if workers > 1 and len(batches) > 1:
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            list(executor.map(export_pages, batches, repeat(output_dir)))
+    else:
+        for batch in batches:
+            export_pages(batch, output_dir)
+
+    for slug in removed:
+        try:
+            os.remove(get_page_path(output_dir, slug))
+        except FileNotFoundError:
+            pass
+
+    export_snippets(output_dir)
+
+    # Written last, so an interrupted export is picked up again next time
+    manifest = {'exported_at': timezone.now().isoformat(), 'pages': pages}
+    write_file(os.path.join(output_dir, MANIFEST_NAME), json.dumps(manifest, indent=2).encode())
+
+    return len(changed), len(pages) - len(changed), len(removed)
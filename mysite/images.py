@@ -0,0 +1,122 @@
+"""
+Image payloads for the API.
+
+Images are serialized with responsive rendition sets instead of only the
+original file. Which set an image gets depends on where it is used: a page
+field name (hero_image) or a StreamField block path
+(content_boxes.boxes.image), mapped to a set by API_IMAGE_RENDITION_CONTEXTS.
+Paths that are not listed use the "default" set.
+
+Only renditions that already exist are included. Missing ones are handed to
+a background task and show up in payloads built after that, including
+cached ones once they expire or are invalidated; until then clients fall
+back to the original url.
+"""
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from wagtail.images.models import Filter
+
+
+def serialize_image(image):
+    return {
+        'id': image.id,
+        'title': image.title,
+        'url': image.file.url,
+        'width': image.width,
+        'height': image.height,
+    }
+
+
+class RenditionSet:
+    """
+    A named set of rendition widths, rendered in the original format and in
+    each extra format (e.g. WebP).
+    """
+
+    def __init__(self, name, widths, formats=('webp',), sizes=None):
+        self.name = name
+        self.widths = sorted(widths)
+        self.formats = list(formats)
+        self.sizes = sizes
+
+        # (format, Filter) pairs; format None is the original format
+        self.filters = []
+        for image_format in [None] + self.formats:
+            for width in self.widths:
+                spec = 'width-%d' % width
+                if image_format:
+                    spec += '|format-%s' % image_format
+                self.filters.append((image_format, Filter(spec)))
+
+    @property
+    def filter_specs(self):
+        return [image_filter.spec for image_format, image_filter in self.filters]
+
+    def serialize(self, image, missing):
+        """
+        Serialize image with its srcsets, adding the specs of renditions that
+        do not exist yet to the missing set.
+        """
+        data = serialize_image(image)
+        renditions = image.find_existing_renditions(
+            *[image_filter for image_format, image_filter in self.filters]
+        )
+
+        srcsets = {image_format: {} for image_format in [None] + self.formats}
+        for image_format, image_filter in self.filters:
+            rendition = renditions.get(image_filter)
+            if rendition is None:
+                missing.add(image_filter.spec)
+                continue
+            # Widths are never upscaled, so small originals produce several
+            # renditions of the same width
+            srcsets[image_format].setdefault(rendition.width, rendition.url)
+
+        data['srcset'] = format_srcset(srcsets[None])
+        data['sources'] = [
+            {'type': 'image/%s' % image_format, 'srcset': format_srcset(srcsets[image_format])}
+            for image_format in self.formats
+        ]
+        if self.sizes:
+            data['sizes'] = self.sizes
+        return data
+
+
+def format_srcset(urls_by_width):
+    return ', '.join('%s %dw' % (url, width) for width, url in sorted(urls_by_width.items()))
+
+
+_rendition_sets = {}
+
+
+def get_rendition_set(path):
+    """
+    Return the RenditionSet for images at path (a page field name or a dotted
+    StreamField block path), or None to serialize them without renditions.
+    """
+    name = settings.API_IMAGE_RENDITION_CONTEXTS.get(path, 'default')
+    try:
+        return _rendition_sets[name]
+    except KeyError:
+        pass
+
+    config = settings.API_IMAGE_RENDITION_SETS.get(name)
+    rendition_set = RenditionSet(name, **config) if config else None
+    _rendition_sets[name] = rendition_set
+    return rendition_set
+
+
+def generate_missing_renditions(missing):
+    """Queue generation of the missing renditions, given {image_id: specs}"""
+    from mysite.tasks import generate_renditions_task
+
+    for image_id, filter_specs in missing.items():
+        if filter_specs:
+            generate_renditions_task.enqueue(image_id, sorted(filter_specs))
+
+
+@receiver(setting_changed)
+def clear_rendition_sets(setting, **kwargs):
+    if setting in ('API_IMAGE_RENDITION_SETS', 'API_IMAGE_RENDITION_CONTEXTS'):
+        _rendition_sets.clear()
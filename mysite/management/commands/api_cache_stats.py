@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+# Importing the API registers its caches
+import mysite.api  # noqa: F401
+from mysite.cache import cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show hit and miss counters of the API caches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help="Reset the counters after showing them")
+
+    def handle(self, *args, **options):
+        for name, stats in sorted(cache_stats.items()):
+            counts = stats.get()
+            hit_rate = '-' if counts['hit_rate'] is None else '%.1f%%' % (counts['hit_rate'] * 100)
+            self.stdout.write("%-20s hits %8d  misses %8d  hit rate %6s" % (
+                name, counts['hits'], counts['misses'], hit_rate,
+            ))
+            if options['reset']:
+                stats.reset()
@@ -0,0 +1,139 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from home.models import HomePage
+from mysite.renderers import get_json_renderer_class
+from mysite.streamfield import serialize_stream, serialize_value
+
+
+def build_home_content(sections):
+    """Raw content_sections data for a deeply nested HomePage"""
+    paragraph = "<p>Lorem ipsum <b>dolor</b> sit amet, <i>consectetur</i> adipiscing elit.</p>"
+    content = []
+    for i in range(sections):
+        content.extend([
+            {'type': 'stats_section', 'id': 'stats-%d' % i, 'value': {
+                'title': 'Stats %d' % i,
+                'stats': [
+                    {'number': '%d+' % n, 'label': 'Label', 'description': 'Description',
+                     'cta_text': 'More', 'cta_link': 'https://example.com/%d' % n}
+                    for n in range(10)
+                ],
+            }},
+            {'type': 'content_boxes', 'id': 'boxes-%d' % i, 'value': {
+                'title': 'Boxes %d' % i,
+                'boxes': [
+                    {'title': 'Box %d' % n, 'content': paragraph, 'image': None,
+                     'link_text': 'Read more', 'link_url': 'https://example.com/%d' % n}
+                    for n in range(10)
+                ],
+            }},
+            {'type': 'project_highlights', 'id': 'projects-%d' % i, 'value': {
+                'section_title': 'Projects',
+                'projects': [
+                    {'title': 'Project %d' % n, 'authors': 'A. Author', 'description': 'Description',
+                     'image': None, 'link_url': 'https://example.com', 'link_text': 'View',
+                     'tags': ['python', 'wagtail', 'django']}
+                    for n in range(10)
+                ],
+            }},
+            {'type': 'news_section', 'id': 'news-%d' % i, 'value': {
+                'section_title': 'News',
+                'news_items': [
+                    {'title': 'News %d' % n, 'date': '2025-01-%02d' % (n + 1), 'summary': paragraph,
+                     'image': None, 'link_url': 'https://example.com', 'link_text': 'Read',
+                     'category': 'General'}
+                    for n in range(10)
+                ],
+            }},
+            {'type': 'rich_content_section', 'id': 'rich-%d' % i, 'value': {
+                'title': 'Rich content',
+                'content': [
+                    {'type': 'heading', 'id': 'h-%d' % n, 'value': 'Heading %d' % n}
+                    for n in range(5)
+                ] + [
+                    {'type': 'paragraph', 'id': 'p-%d' % n, 'value': paragraph}
+                    for n in range(5)
+                ] + [
+                    {'type': 'list', 'id': 'l-%d' % n, 'value': ['one', 'two', 'three']}
+                    for n in range(5)
+                ],
+            }},
+        ])
+    return content
+
+
+class Command(BaseCommand):
+    help = "Benchmark API serialization and rendering against the generic implementation"
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=['streamfield', 'renderer'])
+        parser.add_argument('--sections', type=int, default=20,
+                            help="Number of times each HomePage section type is repeated")
+        parser.add_argument('--repeat', type=int, default=20,
+                            help="Number of timed runs")
+
+    def handle(self, *args, **options):
+        getattr(self, 'benchmark_%s' % options['target'])(options)
+
+    def report(self, label, seconds, repeat):
+        self.stdout.write("%-12s %8.2f ms/run" % (label, seconds * 1000 / repeat))
+
+    def timeit(self, func, value, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func(value)
+        return time.perf_counter() - start
+
+    def benchmark_streamfield(self, options):
+        page = HomePage(title="Benchmark", content_sections=build_home_content(options['sections']))
+        value = page.content_sections
+        # Load every block up front so only serialization is timed
+        list(value)
+
+        if json.dumps(serialize_value(value)) != json.dumps(serialize_stream(value)):
+            raise CommandError("Compiled StreamField output differs from the generic serializer")
+
+        repeat = options['repeat']
+        generic = self.timeit(serialize_value, value, repeat)
+        compiled = self.timeit(serialize_stream, value, repeat)
+
+        self.stdout.write("HomePage content_sections, %d blocks" % len(value))
+        self.report("generic", generic, repeat)
+        self.report("compiled", compiled, repeat)
+        self.stdout.write("speedup      %8.2fx" % (generic / compiled))
+
+    def benchmark_renderer(self, options):
+        page = HomePage(title="Benchmark", content_sections=build_home_content(options['sections']))
+        now = timezone.now()
+        # Shaped like a page_by_slug payload
+        data = {
+            'id': 1,
+            'title': page.title,
+            'slug': 'benchmark',
+            'url_path': '/home/benchmark/',
+            'live': True,
+            'first_published_at': now,
+            'last_published_at': now,
+            'breadcrumbs': [{'title': 'Home', 'url': '/'}],
+            'content_sections': serialize_stream(page.content_sections),
+        }
+
+        renderer_class = get_json_renderer_class()
+        current = JSONRenderer()
+        configured = renderer_class()
+        if configured.render(data) != current.render(data):
+            raise CommandError("%s output differs from JSONRenderer" % renderer_class.__name__)
+
+        repeat = options['repeat']
+        current_time = self.timeit(current.render, data, repeat)
+        configured_time = self.timeit(configured.render, data, repeat)
+
+        self.stdout.write("HomePage payload, %d bytes" % len(current.render(data)))
+        self.report("JSONRenderer", current_time, repeat)
+        self.report(renderer_class.__name__[:12], configured_time, repeat)
+        self.stdout.write("speedup      %8.2fx" % (current_time / configured_time))
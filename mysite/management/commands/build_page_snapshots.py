@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from wagtail.models import Page
+
+from mysite.snapshots import build_snapshot, queue_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the API snapshots of all live pages. Run after deploying changes "
+        "to how pages are serialized"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--background', action='store_true',
+                            help="Queue the pages to be built by the task worker instead")
+
+    def handle(self, *args, **options):
+        page_ids = list(Page.objects.live().exclude(depth=1).values_list('pk', flat=True))
+
+        if options['background']:
+            queue_snapshots(page_ids)
+            self.stdout.write("Queued %d pages" % len(page_ids))
+            return
+
+        built = sum(build_snapshot(page_id) is not None for page_id in page_ids)
+        self.stdout.write("Built %d of %d pages" % (built, len(page_ids)))
@@ -0,0 +1,25 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from mysite.exports import export_api
+
+
+class Command(BaseCommand):
+    help = (
+        "Export page_by_slug payloads of all live pages, navigation menus, footers, "
+        "FAQ and team data as static JSON files for serving from a CDN"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help="Directory to write the files to")
+        parser.add_argument('--full', action='store_true',
+                            help="Export every page, not only those published or moved since the last export")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Number of processes exporting pages (default: one per CPU)")
+
+    def handle(self, *args, **options):
+        written, unchanged, removed = export_api(
+            options['output_dir'], full=options['full'], workers=options['workers'],
+        )
+        self.stdout.write("Exported %d pages, %d unchanged, %d removed" % (written, unchanged, removed))
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mysite', '0001_initial'),
+    ]
+
+    # Keyset pagination of pages by last_published_at, with id to break ties.
+    # wagtailcore_page belongs to Wagtail, so the index is created in SQL.
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS mysite_page_last_published_id '
+            'ON wagtailcore_page (last_published_at, id)',
+            'DROP INDEX IF EXISTS mysite_page_last_published_id',
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class PageSnapshot(models.Model):
+    """
+    The page_by_slug payload of a page's live revision, rendered when the
+    page is published so reads can serve the stored bytes.
+
+    A snapshot only stands for the revision it was built from. Changes that
+    leak into other pages' payloads (ancestors' titles in breadcrumbs, moves,
+    view restrictions, sites and images) delete the affected snapshots and
+    queue them to be built again, see mysite.snapshots.
+    """
+
+    page = models.OneToOneField(
+        'wagtailcore.Page',
+        on_delete=models.CASCADE,
+        related_name='api_snapshot',
+    )
+    revision = models.ForeignKey(
+        'wagtailcore.Revision',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    body = models.BinaryField()
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "Snapshot of page %s at revision %s" % (self.page_id, self.revision_id)
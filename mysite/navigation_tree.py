@@ -0,0 +1,94 @@
+"""
+Materialized navigation menu tree.
+
+All navigation menus, with their items, sub-items and resolved links, are
+rendered to one JSON document and kept in the cache for the current
+navigation version (see mysite.cache). The navigation_menus endpoint and the
+bundle serve the stored bytes as they are.
+
+The version is bumped, and the tree built again once the transaction
+commits, whenever a menu is saved or deleted, a site changes, or a linked
+page (or one of its ancestors) is published, unpublished, moved or deleted.
+A tree that is missing or out of date is built on the next request.
+"""
+import threading
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from mysite.cache import bump_snippet_version, get_snippet_version
+from mysite.renderers import render_json
+from mysite.snippets import serialize_navigation_menus
+from mysite.streamfield import ReferenceResolver
+from navigation.models import MenuItem, NavigationMenu, SubMenuItem
+
+
+NAVIGATION_TREE_KEY = 'api:navigation-tree'
+
+# JSON list of every menu, the navigation version it was built for, the
+# number of menus and when it was built
+NavigationTree = namedtuple('NavigationTree', ['body', 'version', 'count', 'built_at'])
+
+# The navigation version this thread last queued the tree to be built for
+_queued = threading.local()
+
+
+def build_navigation_tree():
+    """Build the tree, store it and return it"""
+    # Read first, so changes made while building bump the version past it
+    version = get_snippet_version('navigation')
+    references = ReferenceResolver()
+    menus = serialize_navigation_menus(references)
+    references.resolve()
+
+    tree = NavigationTree(render_json(menus), version, len(menus), timezone.now())
+    cache.set(NAVIGATION_TREE_KEY, tree, timeout=None)
+    return tree
+
+
+def get_navigation_tree():
+    """The tree of the current navigation version, and whether it was cached"""
+    tree = cache.get(NAVIGATION_TREE_KEY)
+    if tree is not None and tree.version == get_snippet_version('navigation'):
+        return tree, 'HIT'
+    return build_navigation_tree(), 'MISS'
+
+
+def queue_navigation_tree():
+    """Build the tree in the background, once per navigation version"""
+    from mysite.tasks import build_navigation_tree_task
+
+    version = get_snippet_version('navigation')
+    if getattr(_queued, 'version', None) != version:
+        build_navigation_tree_task.enqueue()
+        _queued.version = version
+
+
+def invalidate_navigation_tree():
+    """
+    Bump the navigation version and queue the tree to be built again once
+    the current transaction commits, only once however many menu items are
+    saved in it
+    """
+    bump_snippet_version('navigation')
+    # Every save adds a callback, as a pending flag would be left set by a
+    # transaction that rolls back. The callbacks after the first find the
+    # version queued already
+    transaction.on_commit(queue_navigation_tree)
+
+
+def links_below(url_path):
+    """Whether any menu, item or sub-item links to the page at url_path or below it"""
+    return any(
+        model.objects.filter(link_page__url_path__startswith=url_path).exists()
+        for model in [NavigationMenu, MenuItem, SubMenuItem]
+    )
+
+
+def links_to(page_id):
+    return any(
+        model.objects.filter(link_page_id=page_id).exists()
+        for model in [NavigationMenu, MenuItem, SubMenuItem]
+    )
@@ -0,0 +1,347 @@
+"""
+Field plans for page_by_slug.
+
+A plan is built once per page type from its api_fields. It lists the fields
+to output and how to serialize each one, and which relations to load
+alongside the page, so every page of a type costs the same fixed number of
+queries however its fields are filled in.
+
+Plans work for any model with api_fields. Relations to other models with
+api_fields are output as nested objects, loaded along with the rest.
+"""
+import threading
+from datetime import date, datetime
+from functools import cached_property
+
+from django.core.exceptions import FieldDoesNotExist
+from wagtail.fields import RichTextField, StreamField
+from wagtail.images.models import Image
+from wagtail.models import Page, get_page_models
+from wagtail.rich_text import RichText
+
+from mysite.breadcrumbs import get_breadcrumbs, site_root_map
+from mysite.images import get_rendition_set
+from mysite.renderers import render_json
+from mysite.streamfield import ReferenceResolver, serialize_stream_field
+
+
+def serialize_plain_value(value):
+    if isinstance(value, RichText):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if not isinstance(value, (str, int, bool, float, list, dict, type(None))):
+        return str(value)
+    return value
+
+
+def _write_value(name):
+    def write(page, data, references):
+        data[name] = serialize_plain_value(getattr(page, name))
+    return write
+
+
+def _write_stream(name):
+    def write(page, data, references):
+        data[name] = serialize_stream_field(getattr(page, name), references)
+    return write
+
+
+def _write_rich_text(name):
+    def write(page, data, references):
+        # Expanded along with all other rich text in the response
+        data[name] = None
+        references.add_rich_text(getattr(page, name), data, name)
+    return write
+
+
+def _write_image(name, attname):
+    def write(page, data, references):
+        data[name] = None
+        image_id = getattr(page, attname)
+        if image_id is not None:
+            # Loaded with every other image in the response
+            references.add_image(image_id, data, name, get_rendition_set(name))
+    return write
+
+
+def _write_related_object(name):
+    def write(page, data, references):
+        value = getattr(page, name)
+        data[name] = None if value is None else str(value)
+    return write
+
+
+def _write_related_objects(name):
+    def write(page, data, references):
+        data[name] = [str(obj) for obj in getattr(page, name).all()]
+    return write
+
+
+def get_page_link(page):
+    """The id, title and URL of a linked page"""
+    if page is None:
+        return None
+    return {
+        'id': page.id,
+        'title': page.title,
+        'url': site_root_map.get_url(page.url_path),
+    }
+
+
+def _write_page_link(name):
+    def write(obj, data, references):
+        data[name] = get_page_link(getattr(obj, name))
+    return write
+
+
+def _write_nested_object(name, plan):
+    def write(obj, data, references):
+        value = getattr(obj, name)
+        data[name] = None if value is None else plan.serialize_object(value, references)
+    return write
+
+
+def _write_nested_objects(name, plan):
+    def write(obj, data, references):
+        data[name] = [plan.serialize_object(value, references) for value in getattr(obj, name).all()]
+    return write
+
+
+class FieldPlan:
+    """How objects of one model are loaded and serialized from its api_fields"""
+
+    def __init__(self, model, parents=()):
+        self.model = model
+        # Models this plan is nested in, which are not nested again
+        self.parents = parents + (model,)
+        self.fields = []
+        self.select_related = []
+        self.prefetch_related = []
+        # {name: (select_related, prefetch_related)} of each field
+        self.field_relations = {}
+        # Names of the fields stored in columns of the model's own table
+        self.columns = set()
+
+        for api_field in getattr(model, 'api_fields', []):
+            self.add_field(api_field.name)
+
+    def get_nested_plan(self, model):
+        if issubclass(model, Page) or model in self.parents or not getattr(model, 'api_fields', None):
+            return None
+        return self.create_nested_plan(model)
+
+    def create_nested_plan(self, model):
+        return FieldPlan(model, self.parents)
+
+    def add_field(self, name):
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+
+        select_start = len(self.select_related)
+        prefetch_start = len(self.prefetch_related)
+
+        if field is None:
+            # A property or other attribute
+            writer = _write_value(name)
+        elif isinstance(field, StreamField):
+            writer = _write_stream(name)
+        elif isinstance(field, RichTextField):
+            writer = _write_rich_text(name)
+        elif field.many_to_one and field.related_model is Image:
+            writer = _write_image(name, field.attname)
+        elif field.many_to_one or field.one_to_one:
+            self.select_related.append(name)
+            plan = self.get_nested_plan(field.related_model)
+            if issubclass(field.related_model, Page):
+                writer = _write_page_link(name)
+            elif plan is None:
+                writer = _write_related_object(name)
+            else:
+                self.select_related += ['%s__%s' % (name, path) for path in plan.select_related]
+                self.prefetch_related += ['%s__%s' % (name, path) for path in plan.prefetch_related]
+                writer = _write_nested_object(name, plan)
+        elif field.one_to_many or field.many_to_many:
+            self.prefetch_related.append(name)
+            plan = self.get_nested_plan(field.related_model)
+            if plan is not None:
+                self.prefetch_related += [
+                    '%s__%s' % (name, path) for path in plan.select_related + plan.prefetch_related
+                ]
+                writer = _write_nested_objects(name, plan)
+            else:
+                writer = _write_related_objects(name)
+        else:
+            writer = _write_value(name)
+
+        self.fields.append((name, writer))
+        self.field_relations[name] = (
+            self.select_related[select_start:],
+            self.prefetch_related[prefetch_start:],
+        )
+        if field is not None and field.concrete and field.model is self.model:
+            self.columns.add(name)
+
+    def get_queryset(self):
+        """The model's objects, loaded with everything the plan needs"""
+        return (
+            self.model.objects
+            .select_related(*self.select_related)
+            .prefetch_related(*self.prefetch_related)
+        )
+
+    def serialize(self, obj, data, references, fields=None):
+        """
+        Add the planned fields to data, skipping ones already in it, and
+        ones not in fields if it is given
+        """
+        for name, write in self.fields:
+            if name not in data and (fields is None or name in fields):
+                write(obj, data, references)
+
+    def serialize_object(self, obj, references):
+        data = {'id': obj.pk}
+        self.serialize(obj, data, references)
+        return data
+
+
+# Fields of every page_by_slug payload, ahead of breadcrumbs and the page
+# type's api_fields
+BASE_FIELDS = [
+    'id',
+    'title',
+    'slug',
+    'url_path',
+    'seo_title',
+    'search_description',
+    'live',
+    'has_unpublished_changes',
+    'first_published_at',
+    'last_published_at',
+]
+
+
+class PagePlan(FieldPlan):
+    """How page_by_slug loads and serializes pages of one type"""
+
+    def add_field(self, name):
+        # Written for every page by serialize_page()
+        if name not in BASE_FIELDS and name != 'breadcrumbs':
+            super().add_field(name)
+
+    def get_page(self, pk, fields=None):
+        """
+        Load the specific page with everything the plan needs, or only what
+        the given fields need. The columns of other fields are deferred, so
+        they are neither loaded nor parsed.
+        """
+        if fields is None:
+            return self.get_queryset().get(pk=pk)
+
+        select_related = []
+        prefetch_related = []
+        for name in self.field_names & fields:
+            select, prefetch = self.field_relations[name]
+            select_related += select
+            prefetch_related += prefetch
+
+        return (
+            self.model.objects
+            .select_related(*select_related)
+            .prefetch_related(*prefetch_related)
+            .defer(*self.get_deferred_fields(fields))
+            .get(pk=pk)
+        )
+
+    def get_deferred_fields(self, fields):
+        # Properties may read any column, so nothing is deferred for them
+        if (fields & self.field_names) - self.columns:
+            return []
+
+        return [
+            field.name for field in self.model._meta.concrete_fields
+            if field.model is self.model and not field.primary_key and field.name not in fields
+        ]
+
+    @cached_property
+    def field_names(self):
+        return frozenset(name for name, write in self.fields)
+
+
+class PagePlanRegistry:
+    """Per-process PagePlan for each page type"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plans = {}
+
+    def get(self, model):
+        try:
+            return self._plans[model]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if model not in self._plans:
+                self._plans[model] = PagePlan(model)
+            return self._plans[model]
+
+    def build_all(self):
+        """Build the plans of every page type up front"""
+        for model in get_page_models():
+            self.get(model)
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+
+page_plans = PagePlanRegistry()
+
+
+def get_page_field_names(model):
+    """Every field that can be asked for in the page_by_slug payload of model"""
+    return frozenset(BASE_FIELDS + ['breadcrumbs']) | page_plans.get(model).field_names
+
+
+def load_page(page, fields=None):
+    """
+    Load the specific version of page with what its field plan needs, or
+    only what the given fields need
+    """
+    return page_plans.get(page.specific_class or type(page)).get_page(page.pk, fields)
+
+
+def serialize_page(page, references, fields=None):
+    """
+    Build the page_by_slug payload of page, as loaded by load_page(), with
+    all fields or only the given ones (and id).
+
+    Images and rich text are registered with references and filled in once
+    references.resolve() is called.
+    """
+    data = {}
+    for name in BASE_FIELDS:
+        if fields is None or name in fields or name == 'id':
+            data[name] = getattr(page, name)
+
+    # Add breadcrumbs, from one query rather than the page type's own
+    # get_breadcrumbs()
+    if fields is None or 'breadcrumbs' in fields:
+        data['breadcrumbs'] = get_breadcrumbs(page)
+
+    # Add the page type's api_fields
+    page_plans.get(type(page)).serialize(page, data, references, fields)
+    return data
+
+
+def render_page(page, references=None, fields=None):
+    """The page_by_slug payload of page, as loaded by load_page(), in JSON"""
+    if references is None:
+        references = ReferenceResolver()
+    data = serialize_page(page, references, fields)
+    # Images and rich text are loaded in bulk once every field has been walked
+    references.resolve()
+    return render_json(data)
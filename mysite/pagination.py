@@ -0,0 +1,156 @@
+"""
+Pagination of API listings.
+
+Listings are paginated with offset and limit by default. Requests with a
+cursor parameter (empty for the first page) are paginated on a keyset
+instead: each page picks up after the ordering values of the previous
+page's last item, so deep pages cost the same as the first one, and no
+total count is run. The response meta holds an opaque "next" cursor, which
+is null on the last page.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import F, Q
+from wagtail.api.v2.pagination import WagtailPagination
+from wagtail.api.v2.utils import BadRequestError
+from rest_framework.response import Response
+
+
+def _after_path(values):
+    return Q(path__gt=values[0])
+
+
+def _after_published(values):
+    last_published_at, pk = values
+    if last_published_at is None:
+        # Pages without a publish date come first
+        return Q(last_published_at__isnull=True, pk__gt=pk) | Q(last_published_at__isnull=False)
+    return Q(last_published_at__gt=last_published_at) | Q(last_published_at=last_published_at, pk__gt=pk)
+
+
+def _before_published(values):
+    last_published_at, pk = values
+    if last_published_at is None:
+        # Pages without a publish date come last
+        return Q(last_published_at__isnull=True, pk__lt=pk)
+    return (
+        Q(last_published_at__lt=last_published_at)
+        | Q(last_published_at=last_published_at, pk__lt=pk)
+        | Q(last_published_at__isnull=True)
+    )
+
+
+class KeysetOrdering:
+    def __init__(self, fields, order_by, filter_after):
+        self.fields = fields
+        self.order_by = order_by
+        self.filter_after = filter_after
+
+    def get_values(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+
+# Orderings that can be paginated with a cursor, by their order parameter
+KEYSET_ORDERINGS = {
+    'path': KeysetOrdering(['path'], ['path'], _after_path),
+    'last_published_at': KeysetOrdering(
+        ['last_published_at', 'pk'],
+        [F('last_published_at').asc(nulls_first=True), 'pk'],
+        _after_published,
+    ),
+    '-last_published_at': KeysetOrdering(
+        ['last_published_at', 'pk'],
+        [F('last_published_at').desc(nulls_last=True), '-pk'],
+        _before_published,
+    ),
+}
+
+
+def encode_cursor(order, values):
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps([order] + values).encode()).decode()
+
+
+def decode_cursor(cursor, order):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(data, list) or len(data) != len(KEYSET_ORDERINGS[order].fields) + 1 or data[0] != order:
+            raise ValueError
+        values = data[1:]
+        if order == 'path':
+            if not isinstance(values[0], str):
+                raise ValueError
+        else:
+            last_published_at, pk = values
+            if last_published_at is not None:
+                values[0] = datetime.fromisoformat(last_published_at)
+            if not isinstance(pk, int) or isinstance(pk, bool):
+                raise ValueError
+        return values
+    except (ValueError, TypeError, binascii.Error):
+        raise BadRequestError("cursor is invalid or does not match the order")
+
+
+def get_limit(request):
+    """The limit parameter, checked the same way as WagtailPagination does"""
+    limit_max = getattr(settings, 'WAGTAILAPI_LIMIT_MAX', 20)
+    try:
+        limit = int(request.GET.get('limit', 20 if not limit_max else min(20, limit_max)))
+        if limit < 0:
+            raise ValueError()
+    except ValueError:
+        raise BadRequestError("limit must be a positive integer")
+
+    if limit_max and limit > limit_max:
+        raise BadRequestError("limit cannot be higher than %d" % limit_max)
+    return limit
+
+
+class PagesPagination(WagtailPagination):
+    """WagtailPagination, or keyset pagination for requests with a cursor"""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.next_cursor = None
+        self.keyset = 'cursor' in request.GET
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        if 'offset' in request.GET:
+            raise BadRequestError("offset cannot be combined with cursor")
+
+        order = request.GET.get('order') or 'path'
+        if order not in KEYSET_ORDERINGS:
+            raise BadRequestError(
+                "cursor pagination can only order by %s" % ", ".join(sorted(KEYSET_ORDERINGS))
+            )
+        ordering = KEYSET_ORDERINGS[order]
+
+        limit = get_limit(request)
+        if limit == 0:
+            # An empty page has no last item to carry on from
+            raise BadRequestError("limit must be at least 1 with cursor")
+        queryset = queryset.order_by(*ordering.order_by)
+        if request.GET['cursor']:
+            queryset = queryset.filter(ordering.filter_after(decode_cursor(request.GET['cursor'], order)))
+
+        # One more than the limit shows whether there is a next page
+        items = list(queryset[:limit + 1])
+        if len(items) > limit:
+            items = items[:limit]
+            self.next_cursor = encode_cursor(order, ordering.get_values(items[-1]))
+
+        self.view = view
+        return items
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response({
+            'meta': {'next': self.next_cursor},
+            'items': data,
+        })
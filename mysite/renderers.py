@@ -0,0 +1,59 @@
+"""
+JSON rendering of API responses.
+
+The renderer is set with API_JSON_RENDERER and used by the API endpoints,
+page_by_slug, snapshots and exports alike. FastJSONRenderer encodes with
+orjson when it is installed, which handles strings, numbers, dicts, lists
+and UUIDs natively. Dates, times, Decimals and anything else are passed to
+DRF's encoder, so they come out as JSONRenderer writes them. Indented
+output, as for the browsable API, is left to JSONRenderer.
+
+The output is otherwise not byte for byte JSONRenderer's: orjson writes
+floats in its own shortest form (the same values, such as 1e16 rather than
+1e+16), and NaN and infinities as null where JSONRenderer raises ValueError
+under STRICT_JSON.
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer on top of orjson, falling back to the stdlib without it"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # orjson only indents with two spaces
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        # Dates and times go through the encoder, which shortens microseconds
+        # to milliseconds and writes UTC as "Z"
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        body = orjson.dumps(data, default=self.encoder_class().default, option=options)
+        # Escaped by JSONRenderer too, as they end lines in JavaScript
+        if b'\xe2\x80\xa8' in body or b'\xe2\x80\xa9' in body:
+            body = body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return body
+
+
+# Renderer class by dotted path
+_renderer_classes = {}
+
+
+def get_json_renderer_class():
+    path = settings.API_JSON_RENDERER
+    if path not in _renderer_classes:
+        _renderer_classes[path] = import_string(path)
+    return _renderer_classes[path]
+
+
+def render_json(data):
+    return get_json_renderer_class()().render(data)
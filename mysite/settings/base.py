@@ -35,6 +35,7 @@ INSTALLED_APPS = [
     "team",
     "faq",
     "taxonomy",
+    "mysite",
     "wagtail.contrib.forms",
     "wagtail.contrib.redirects",
     "wagtail.embeds",
@@ -49,6 +50,8 @@ INSTALLED_APPS = [
     "modelcluster",
     "taggit",
     "django_filters",
+    "django_tasks",
+    "django_tasks.backends.database",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -78,6 +81,43 @@ CORS_ALLOW_CREDENTIALS = True
 
 WAGTAILAPI_BASE_URL = 'http://localhost:8000'
 
+# Serialize StreamFields for the API from the JSON stored in the database
+# instead of deserializing every block first. Set to False to fall back to
+# serializing block values.
+API_STREAMFIELD_RAW_MODE = True
+
+# Renderer for JSON API responses. FastJSONRenderer uses orjson if it is
+# installed and otherwise renders like DRF's JSONRenderer.
+API_JSON_RENDERER = 'mysite.renderers.FastJSONRenderer'
+
+# Seconds a published page_by_slug payload stays cached. Entries are also
+# invalidated as soon as pages are published, unpublished, moved or deleted.
+API_PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Seconds the navigation menus, footer and FAQ collections of the bundle
+# endpoint stay cached. Entries are also invalidated as soon as any of
+# them, or any page, is changed.
+API_SNIPPET_CACHE_TIMEOUT = 60 * 60
+
+# Responsive renditions included with API images. Each set lists the widths
+# to render, in the original format and in each of "formats", and an
+# optional "sizes" attribute for the frontend.
+API_IMAGE_RENDITION_SETS = {
+    'default': {'widths': [480, 960, 1600]},
+    'hero': {'widths': [768, 1280, 1920, 2560], 'sizes': '100vw'},
+    'content_box': {'widths': [320, 640, 960], 'sizes': '(min-width: 768px) 33vw, 100vw'},
+    'news_thumbnail': {'widths': [160, 320, 480], 'sizes': '(min-width: 768px) 25vw, 50vw'},
+}
+
+# Rendition set used for images at a page field name or StreamField block
+# path. Images anywhere else use the "default" set.
+API_IMAGE_RENDITION_CONTEXTS = {
+    'hero_image': 'hero',
+    'content_boxes.boxes.image': 'content_box',
+    'project_highlights.projects.image': 'content_box',
+    'news_section.news_items.image': 'news_thumbnail',
+}
+
 ROOT_URLCONF = "mysite.urls"
 
 TEMPLATES = [
@@ -151,9 +191,7 @@ STATICFILES_FINDERS = [
     "django.contrib.staticfiles.finders.AppDirectoriesFinder",
 ]
 
-STATICFILES_DIRS = [
-    os.path.join(PROJECT_DIR, "static"),
-]
+# mysite is an installed app, so AppDirectoriesFinder picks up mysite/static
 
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 STATIC_URL = "/static/"
@@ -177,6 +215,35 @@ STORAGES = {
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 10_000
 
 
+# Cache
+# API payloads and the versions that invalidate them are kept in the cache,
+# so it must be shared by every worker process. The database cache needs its
+# table created with:
+#     python manage.py createcachetable
+# Each request reads the versions from it once (see mysite.cache).
+# Redis or Memcached can be used instead where available.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "api_cache",
+        "OPTIONS": {
+            "MAX_ENTRIES": 20000,
+        },
+    }
+}
+
+
+# Background tasks
+# Tasks, such as generating missing image renditions and building page
+# snapshots, are stored in the database and run by a separate worker process:
+#     python manage.py db_worker
+TASKS = {
+    "default": {
+        "BACKEND": "django_tasks.backends.database.DatabaseBackend",
+    }
+}
+
+
 # Wagtail settings
 
 WAGTAIL_SITE_NAME = "mysite"
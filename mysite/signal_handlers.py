@@ -0,0 +1,137 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+from wagtail.images.models import Image
+from wagtail.models import Page, PageViewRestriction, ReferenceIndex, Site, get_page_models
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from mysite.cache import bump_content_version, bump_snippet_version, finish_request, start_request
+from mysite.navigation_tree import invalidate_navigation_tree, links_below, links_to
+from mysite.models import PageSnapshot
+from mysite.snapshots import build_snapshot, invalidate_snapshots
+from mysite.snippets import SNIPPET_GROUPS, get_snippet_group
+
+
+def invalidate_published_content(**kwargs):
+    bump_content_version()
+
+
+def invalidate_snippets(sender, **kwargs):
+    group = get_snippet_group(sender)
+    if group == 'navigation':
+        invalidate_navigation_tree()
+    else:
+        bump_snippet_version(group)
+
+
+def invalidate_linked_navigation(instance, url_path_after=None, **kwargs):
+    # Links to the pages below change along with the page's URL
+    if links_below(url_path_after or instance.url_path):
+        invalidate_navigation_tree()
+
+
+def invalidate_deleted_navigation_links(instance, **kwargs):
+    # Menus linking to the page are unlinked without a signal
+    if links_to(instance.pk):
+        invalidate_navigation_tree()
+
+
+def invalidate_site_navigation(**kwargs):
+    invalidate_navigation_tree()
+
+
+def build_published_snapshot(instance, **kwargs):
+    build_snapshot(instance.pk)
+    # Breadcrumbs of the pages below show its title and URL
+    invalidate_snapshots(Page.objects.descendant_of(instance))
+
+
+def invalidate_subtree_snapshots(instance, **kwargs):
+    invalidate_snapshots(Page.objects.descendant_of(instance, inclusive=True))
+
+
+def invalidate_restricted_snapshots(instance, **kwargs):
+    page = Page.objects.filter(pk=instance.page_id).first()
+    if page is not None:
+        invalidate_subtree_snapshots(page)
+
+
+def invalidate_all_snapshots(**kwargs):
+    invalidate_snapshots(Page.objects.all())
+
+
+# Image fields Wagtail fills in lazily, which are in no payload
+IMAGE_UNSERIALIZED_FIELDS = {'file_size', 'file_hash'}
+
+
+def get_pages_using(obj):
+    """Pages whose content references obj, from Wagtail's reference index"""
+    page_ids = (
+        ReferenceIndex.get_references_to(obj)
+        .filter(base_content_type=ContentType.objects.get_for_model(Page))
+        .values_list('object_id', flat=True)
+    )
+    return Page.objects.filter(pk__in=[int(page_id) for page_id in page_ids])
+
+
+def invalidate_image_content(instance, created=False, update_fields=None, **kwargs):
+    # A new image is not in any payload yet
+    if created or (update_fields is not None and set(update_fields) <= IMAGE_UNSERIALIZED_FIELDS):
+        return
+    bump_content_version()
+    invalidate_snapshots(get_pages_using(instance))
+
+
+def drop_draft_snapshot(instance, update_fields=None, **kwargs):
+    # Saving the first draft after a publish sets has_unpublished_changes,
+    # which is in the payload. The page is served by the serializer until
+    # it is published again
+    if update_fields is not None and 'has_unpublished_changes' in update_fields:
+        PageSnapshot.objects.filter(page_id=instance.pk).delete()
+
+
+def register_signal_handlers():
+    # Versions are read once per request
+    request_started.connect(start_request)
+    request_finished.connect(finish_request)
+
+    page_published.connect(invalidate_published_content)
+    page_unpublished.connect(invalidate_published_content)
+    post_page_move.connect(invalidate_published_content)
+    # Deleting a page of any type deletes its wagtailcore.Page row as well
+    post_delete.connect(invalidate_published_content, sender=Page)
+
+    # Sites change page URLs, view restrictions hide pages from breadcrumbs
+    # and images are embedded in payloads
+    for model in [Site, PageViewRestriction]:
+        post_save.connect(invalidate_published_content, sender=model)
+        post_delete.connect(invalidate_published_content, sender=model)
+    post_save.connect(invalidate_image_content, sender=Image)
+    post_delete.connect(invalidate_image_content, sender=Image)
+
+    # Snapshots of deleted pages go with them
+    page_published.connect(build_published_snapshot)
+    page_unpublished.connect(invalidate_subtree_snapshots)
+    post_page_move.connect(invalidate_subtree_snapshots)
+    post_save.connect(invalidate_restricted_snapshots, sender=PageViewRestriction)
+    post_delete.connect(invalidate_restricted_snapshots, sender=PageViewRestriction)
+    post_save.connect(invalidate_all_snapshots, sender=Site)
+    post_delete.connect(invalidate_all_snapshots, sender=Site)
+    # Every page type is a sender of its own
+    for model in get_page_models():
+        post_save.connect(drop_draft_snapshot, sender=model)
+
+    # Snippet data is cached per group of snippet models
+    for models in SNIPPET_GROUPS.values():
+        for model in models:
+            post_save.connect(invalidate_snippets, sender=model)
+            post_delete.connect(invalidate_snippets, sender=model)
+
+    # The navigation tree holds the URLs of linked pages
+    page_published.connect(invalidate_linked_navigation)
+    page_unpublished.connect(invalidate_linked_navigation)
+    post_page_move.connect(invalidate_linked_navigation)
+    pre_delete.connect(invalidate_deleted_navigation_links, sender=Page)
+    post_save.connect(invalidate_site_navigation, sender=Site)
+    post_delete.connect(invalidate_site_navigation, sender=Site)
@@ -0,0 +1,118 @@
+"""
+Publish-time snapshots of page_by_slug payloads.
+
+Publishing a page renders its payload, with StreamFields, breadcrumbs and
+image renditions, and stores it as a PageSnapshot tied to the live revision.
+page_by_slug serves the stored bytes, and the pages endpoint reuses the
+stored StreamFields, for as long as the revision is live. Drafts and
+previews never have a snapshot and go through the serializer.
+
+Changes that show up in other pages' payloads delete the snapshots of the
+pages concerned, so they fall back to the serializer straight away, and
+queue them to be built again in the background.
+"""
+import json
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from wagtail.models import Page
+
+from mysite.models import PageSnapshot
+from mysite.page_plans import load_page, render_page
+from mysite.streamfield import ReferenceResolver
+
+
+logger = logging.getLogger(__name__)
+
+# Pages built by each background task
+REBUILD_BATCH_SIZE = 100
+
+
+def render_snapshot(page):
+    """
+    Render the payload of page, as loaded by load_page(). Renditions that do
+    not exist yet are generated first, so the snapshot lists all of them.
+    """
+    from mysite.tasks import generate_renditions_task
+
+    missing = {}
+    body = render_page(page, ReferenceResolver(generate_renditions=missing.update))
+
+    missing = {image_id: specs for image_id, specs in missing.items() if specs}
+    if not missing:
+        return body
+
+    for image_id, filter_specs in missing.items():
+        generate_renditions_task.call(image_id, sorted(filter_specs))
+    return render_page(page)
+
+
+def build_snapshot(page_id):
+    """
+    Store the payload of the page's live revision, or delete its snapshot if
+    the page is not live. Returns the snapshot, if any.
+    """
+    page = Page.objects.filter(pk=page_id).live().first()
+    if page is None or page.live_revision_id is None:
+        PageSnapshot.objects.filter(page_id=page_id).delete()
+        return None
+
+    try:
+        body = render_snapshot(load_page(page))
+    except Exception:
+        # Publishing must not fail because of the API, and reads fall back
+        # to the serializer without a snapshot
+        logger.exception("Could not build the API snapshot of page %s", page_id)
+        PageSnapshot.objects.filter(page_id=page_id).delete()
+        return None
+
+    snapshot, created = PageSnapshot.objects.update_or_create(
+        page_id=page_id,
+        defaults={'revision_id': page.live_revision_id, 'body': body},
+    )
+    return snapshot
+
+
+def get_snapshot_body(page):
+    """The stored payload of the page's live revision, or None"""
+    if page.live_revision_id is None:
+        return None
+
+    body = (
+        PageSnapshot.objects
+        .filter(page_id=page.pk, revision_id=page.live_revision_id)
+        .values_list('body', flat=True)
+        .first()
+    )
+    # Some databases return a memoryview, which cannot be cached
+    return None if body is None else bytes(body)
+
+
+def get_snapshot_data(page_ids):
+    """{page id: payload} for the pages with a snapshot of their live revision"""
+    snapshots = (
+        PageSnapshot.objects
+        .filter(page_id__in=page_ids, revision_id=F('page__live_revision_id'))
+        .values_list('page_id', 'body')
+    )
+    return {page_id: json.loads(bytes(body)) for page_id, body in snapshots}
+
+
+def queue_snapshots(page_ids):
+    """Build the snapshots of the pages in the background"""
+    from mysite.tasks import build_snapshots_task
+
+    for start in range(0, len(page_ids), REBUILD_BATCH_SIZE):
+        build_snapshots_task.enqueue(page_ids[start:start + REBUILD_BATCH_SIZE])
+
+
+def invalidate_snapshots(pages):
+    """
+    Delete the snapshots of pages, a Page queryset, and queue the live ones
+    to be built again once the current transaction commits.
+    """
+    page_ids = list(pages.live().values_list('pk', flat=True))
+    PageSnapshot.objects.filter(page__in=pages).delete()
+    if page_ids:
+        transaction.on_commit(lambda: queue_snapshots(page_ids))
@@ -0,0 +1,185 @@
+"""
+Serialized snippet data, shared by the bundle endpoint and static exports.
+
+Snippets are serialized from their api_fields with field plans. Each group
+of snippet models has a version (see mysite.cache) that is bumped whenever
+one of its models is saved or deleted, for caching what is built from it.
+"""
+from django.db.models import Prefetch
+
+from faq.models import FAQCategory, FAQCollection, FAQCollectionItem, FAQItem
+from footer.models import Footer, FooterColumn, FooterLink, SocialMediaLink
+from navigation.models import MegaMenu, MenuItem, NavigationMenu, SubMenuItem
+from taxonomy.models import Category
+from team.models import Department, ExpertiseArea, Role, TeamMember, TeamMemberSocialLink
+from wagtail.models import Page
+
+from mysite.breadcrumbs import site_root_map
+from mysite.page_plans import FieldPlan, get_page_link
+
+
+# Models of each snippet group, including the inline models saved with them
+SNIPPET_GROUPS = {
+    'navigation': [NavigationMenu, MenuItem, SubMenuItem],
+    'mega_menu': [MegaMenu],
+    'footer': [Footer, FooterColumn, FooterLink, SocialMediaLink],
+    'faq': [FAQCategory, FAQItem, FAQCollection, FAQCollectionItem],
+    'team': [Department, Role, TeamMember, TeamMemberSocialLink, ExpertiseArea],
+    'category': [Category],
+}
+
+
+def get_snippet_group(model):
+    for name, models in SNIPPET_GROUPS.items():
+        if model in models:
+            return name
+    return None
+
+
+def get_link(entry):
+    """
+    The link of a navigation menu, menu item, sub-item or footer link, as its
+    link property gives it, from the linked page loaded along with it
+    """
+    if entry.link_page_id is None:
+        return entry.link_url
+    return site_root_map.get_url(entry.link_page.url_path)
+
+
+def _write_link(entry, data, references):
+    data['link'] = get_link(entry)
+
+
+# Models whose links are written by get_link(), as menus write theirs
+LINK_MODELS = {FooterLink}
+
+
+class SnippetPlan(FieldPlan):
+    """A field plan for snippets, which also writes the links of LINK_MODELS"""
+
+    def __init__(self, model, parents=()):
+        super().__init__(model, parents)
+        if model in LINK_MODELS:
+            self.fields.append(('link', _write_link))
+
+    def create_nested_plan(self, model):
+        return SnippetPlan(model, self.parents)
+
+
+def serialize_category_tree(references):
+    """
+    Active categories nested under their parents as children, in display
+    order, from one query. Categories below inactive ones are left out.
+    """
+    plan = SnippetPlan(Category)
+    # The tree shows the parents
+    fields = {name for name, write in plan.fields} - {'parent'}
+
+    nodes = {}
+    for category in Category.objects.select_related(None).filter(is_active=True):
+        data = {'id': category.pk}
+        plan.serialize(category, data, references, fields)
+        data['children'] = []
+        nodes[category.pk] = (category.parent_id, data)
+
+    roots = []
+    for parent_id, data in nodes.values():
+        if parent_id is None:
+            roots.append(data)
+        elif parent_id in nodes:
+            nodes[parent_id][1]['children'].append(data)
+    return roots
+
+
+def serialize_objects(queryset, references):
+    plan = SnippetPlan(queryset.model)
+    queryset = queryset.select_related(*plan.select_related).prefetch_related(*plan.prefetch_related)
+    return [plan.serialize_object(obj, references) for obj in queryset]
+
+
+def get_navigation_menus():
+    """Navigation menus with their items, sub-items and linked pages"""
+    return NavigationMenu.objects.select_related('link_page').prefetch_related(
+        Prefetch('menu_items', queryset=MenuItem.objects.select_related('link_page')),
+        Prefetch('menu_items__sub_items', queryset=SubMenuItem.objects.select_related('link_page')),
+    )
+
+
+def serialize_navigation_menus(references):
+    from mysite.api import MenuItemSerializer
+
+    return [
+        {
+            'id': menu.id,
+            'title': menu.title,
+            'slug': menu.slug,
+            'link': get_link(menu),
+            'link_url': menu.link_url,
+            'display_order': menu.display_order,
+            'menu_items': MenuItemSerializer(menu.menu_items.all(), many=True).data,
+        }
+        for menu in get_navigation_menus()
+    ]
+
+
+# ReferenceResolver serializers writing pages chosen in StreamFields as
+# links, for menus
+PAGE_LINK_SERIALIZERS = {Page: get_page_link}
+
+
+def serialize_footers(references):
+    return serialize_objects(Footer.objects.order_by('pk'), references)
+
+
+def serialize_active_footer(references):
+    """The footer shown on the site, which is the first one created"""
+    footers = serialize_objects(Footer.objects.order_by('pk')[:1], references)
+    return footers[0] if footers else None
+
+
+def serialize_faq_categories(references):
+    """
+    Published FAQ items grouped by category, in category order, and the
+    items without a category. Categories are loaded along with the items and
+    grouped in one pass over them; categories without published items are
+    left out.
+    """
+    # Ordered by category first, so each category's items come together
+    items = serialize_objects(FAQItem.objects.filter(is_published=True), references)
+
+    categories = {}
+    uncategorized = []
+    for item in items:
+        category = item['category']
+        if category is None:
+            uncategorized.append(item)
+            continue
+        if category['id'] not in categories:
+            categories[category['id']] = dict(category, items=[])
+        categories[category['id']]['items'].append(item)
+
+    return {
+        'categories': list(categories.values()),
+        'uncategorized': uncategorized,
+    }
+
+
+def serialize_faq(references):
+    return dict(
+        serialize_faq_categories(references),
+        collections=serialize_objects(FAQCollection.objects.order_by('pk'), references),
+    )
+
+
+def serialize_faq_collection(title, references):
+    """The first FAQ collection with the title, or None"""
+    collections = serialize_objects(FAQCollection.objects.filter(title=title).order_by('pk')[:1], references)
+    return collections[0] if collections else None
+
+
+def serialize_team(references):
+    return {
+        'members': serialize_objects(TeamMember.objects.filter(is_active=True), references),
+        'departments': serialize_objects(Department.objects.all(), references),
+        'roles': serialize_objects(Role.objects.all(), references),
+    }
@@ -0,0 +1,501 @@
+"""
+StreamField serialization for the API.
+
+Each block definition is walked once and compiled into a function that
+serializes values of that block, so serializing a page no longer runs the
+generic isinstance/hasattr chain for every leaf value. Compiled functions are
+cached per block object; block definitions live for the whole process.
+
+There are two kinds of compiled serializer:
+
+* value serializers work on deserialized block values (StreamValue,
+  StructValue, RichText, Image...)
+* raw serializers work on the JSON stored in the database
+  (StreamValue.raw_data). Scalar leaves are copied as they are and only
+  reference-bearing leaves (chosen objects and rich text) are converted,
+  in bulk, by a ReferenceResolver once the whole response has been walked.
+
+Both produce exactly the same output as serialize_value(), except that raw
+serializers add responsive renditions to images (see mysite.images).
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from functools import partial
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from wagtail import blocks
+from wagtail.blocks.list_block import ListValue
+from wagtail.blocks.stream_block import StreamValue
+from wagtail.images.blocks import ImageChooserBlock
+from wagtail.images.models import Image
+from wagtail.rich_text import RichText
+
+from mysite.images import generate_missing_renditions, get_rendition_set, serialize_image
+from mysite.rich_text import expand_db_html_many
+
+
+SCALAR_TYPES = (str, int, float, bool)
+
+# Blocks whose values are already plain JSON scalars
+SCALAR_BLOCKS = (
+    blocks.CharBlock,
+    blocks.TextBlock,
+    blocks.URLBlock,
+    blocks.EmailBlock,
+    blocks.RegexBlock,
+    blocks.ChoiceBlock,
+    blocks.RawHTMLBlock,
+    blocks.BooleanBlock,
+    blocks.IntegerBlock,
+    blocks.FloatBlock,
+)
+
+
+def serialize_stream(value):
+    """Serialize a StreamValue using its compiled block serializer"""
+    return get_block_serializer(value.stream_block)(value)
+
+
+def serialize_value(value):
+    """
+    Serialize any block value without knowing its block definition.
+
+    Used for blocks that have no specialised serializer. It is also the
+    reference output that compiled serializers must reproduce exactly.
+    """
+    # Handle None
+    if value is None:
+        return None
+
+    # Handle basic types first
+    if isinstance(value, SCALAR_TYPES):
+        return value
+
+    # Handle ListValue (from ListBlock) - must come before list/tuple check
+    if isinstance(value, ListValue):
+        return [serialize_value(item) for item in value]
+
+    # Handle StructValue (nested blocks) - check for items() method
+    if hasattr(value, 'items') and callable(value.items):
+        return {key: serialize_value(val) for key, val in value.items()}
+
+    # Handle StreamValue (nested StreamField)
+    if isinstance(value, StreamValue):
+        return [
+            {
+                'type': child.block_type,
+                'value': serialize_value(child.value),
+                'id': str(child.id),
+            }
+            for child in value
+        ]
+
+    # Handle regular lists/tuples
+    if isinstance(value, (list, tuple)):
+        return [serialize_value(item) for item in value]
+
+    # Handle RichText
+    if isinstance(value, RichText):
+        return str(value)
+
+    # Handle Images
+    if isinstance(value, Image):
+        return serialize_image(value)
+
+    # Handle dates
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+
+    # Default: convert to string
+    return str(value)
+
+
+# id(block) -> (block, serializer). Blocks define __eq__ without __hash__, so
+# they are keyed by identity and kept alive alongside their serializer.
+_block_serializers = {}
+
+
+def get_block_serializer(block):
+    """Return the compiled serializer for a block definition"""
+    try:
+        cached_block, serializer = _block_serializers[id(block)]
+    except KeyError:
+        pass
+    else:
+        if cached_block is block:
+            return serializer
+
+    # Compiling is deterministic, so two threads racing here build equivalent
+    # functions and either one can win
+    serializer = compile_block(block)
+    _block_serializers[id(block)] = (block, serializer)
+    return serializer
+
+
+def compile_block(block):
+    """Build a function that serializes values of the given block"""
+    if isinstance(block, blocks.BaseStreamBlock):
+        return _compile_stream_block(block)
+    if isinstance(block, blocks.BaseStructBlock):
+        return _compile_struct_block(block)
+    if isinstance(block, blocks.ListBlock):
+        return _compile_list_block(block)
+    if isinstance(block, blocks.RichTextBlock):
+        return _serialize_rich_text
+    if isinstance(block, ImageChooserBlock):
+        return _serialize_image_value
+    if isinstance(block, (blocks.DateBlock, blocks.DateTimeBlock)):
+        return _serialize_date
+    if isinstance(block, SCALAR_BLOCKS):
+        return _serialize_scalar
+    return serialize_value
+
+
+def _compile_stream_block(block):
+    child_serializers = {
+        name: get_block_serializer(child_block)
+        for name, child_block in block.child_blocks.items()
+    }
+
+    def serialize(value):
+        if value is None:
+            return None
+        return [
+            {
+                'type': child.block_type,
+                'value': child_serializers.get(child.block_type, serialize_value)(child.value),
+                'id': str(child.id),
+            }
+            for child in value
+        ]
+
+    return serialize
+
+
+def _compile_struct_block(block):
+    child_serializers = {
+        name: get_block_serializer(child_block)
+        for name, child_block in block.child_blocks.items()
+    }
+    get_child_serializer = child_serializers.get
+
+    def serialize(value):
+        if value is None:
+            return None
+        return {
+            key: get_child_serializer(key, serialize_value)(val)
+            for key, val in value.items()
+        }
+
+    return serialize
+
+
+def _compile_list_block(block):
+    child_serializer = get_block_serializer(block.child_block)
+
+    def serialize(value):
+        if value is None:
+            return None
+        return [child_serializer(item) for item in value]
+
+    return serialize
+
+
+def _serialize_scalar(value):
+    if value is None or isinstance(value, SCALAR_TYPES):
+        return value
+    return serialize_value(value)
+
+
+def _serialize_rich_text(value):
+    if isinstance(value, RichText):
+        return str(value)
+    return serialize_value(value)
+
+
+def _serialize_image_value(value):
+    if isinstance(value, Image):
+        return serialize_image(value)
+    return serialize_value(value)
+
+
+def _serialize_date(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return serialize_value(value)
+
+
+class ReferenceResolver:
+    """
+    Collects the objects and rich text referenced from raw StreamField data.
+
+    Raw serializers write None placeholders and register the container and
+    key to fill in. resolve() then loads each model's objects with a single
+    query and writes the serialized values into place.
+
+    Images are loaded together with their existing renditions (one more
+    query), and renditions that do not exist yet are passed to
+    generate_renditions as {image_id: filter_specs}, which queues them for
+    generation by default.
+    Rich text is expanded in a single pass over every value, so its page
+    links and image embeds are loaded in bulk too.
+
+    serializers maps models to the function that writes their objects, in
+    place of the chooser block's own serializer.
+    """
+
+    def __init__(self, generate_renditions=generate_missing_renditions, serializers=None):
+        self.generate_renditions = generate_renditions
+        self.serializers = serializers or {}
+        self._objects = defaultdict(list)
+        self._rich_text = []
+        self._rendition_specs = set()
+        self._missing_renditions = defaultdict(set)
+
+    def add_object(self, model, pk, container, key, serializer):
+        serializer = self.serializers.get(model, serializer)
+        self._objects[model].append((pk, container, key, serializer))
+
+    def add_image(self, pk, container, key, rendition_set=None):
+        if rendition_set is None:
+            self.add_object(Image, pk, container, key, _serialize_image_value)
+        else:
+            self._rendition_specs.update(rendition_set.filter_specs)
+            self.add_object(Image, pk, container, key, partial(self._serialize_image, rendition_set))
+
+    def add_rich_text(self, source, container, key):
+        self._rich_text.append((source or '', container, key))
+
+    def _serialize_image(self, rendition_set, image):
+        if image is None:
+            return None
+        return rendition_set.serialize(image, self._missing_renditions[image.pk])
+
+    def resolve(self):
+        for model, references in self._objects.items():
+            queryset = model.objects.all()
+            if model is Image and self._rendition_specs:
+                queryset = queryset.prefetch_renditions(*self._rendition_specs)
+
+            instances = queryset.in_bulk({reference[0] for reference in references})
+            for pk, container, key, serializer in references:
+                container[key] = serializer(instances.get(pk))
+
+        # All rich text in one pass, so links and embeds are loaded in bulk
+        sources = [source for source, container, key in self._rich_text]
+        for (source, container, key), html in zip(self._rich_text, expand_db_html_many(sources)):
+            container[key] = html
+
+        self.generate_renditions(self._missing_renditions)
+
+        self._objects.clear()
+        self._rich_text.clear()
+        self._rendition_specs.clear()
+        self._missing_renditions.clear()
+
+
+def serialize_stream_field(value, resolver):
+    """
+    Convert a StreamField value to a list of dicts.
+
+    In raw mode, images, pages and rich text are registered with resolver
+    and only filled in once resolver.resolve() is called, so a whole
+    response can load them with one query per model.
+    """
+    if not settings.API_STREAMFIELD_RAW_MODE:
+        # Convert StreamField to list of dicts using the compiled block plan
+        return serialize_stream(value)
+
+    # Build the output straight from the stored JSON
+    return serialize_raw_stream(value, resolver)
+
+
+def serialize_raw_stream(value, resolver):
+    """
+    Serialize a StreamValue from its raw JSON data.
+
+    References are registered with resolver; the result is only complete once
+    resolver.resolve() has been called.
+    """
+    result = [None]
+    get_raw_serializer(value.stream_block)(value.raw_data, resolver, result, 0)
+    return result[0]
+
+
+_raw_block_serializers = {}
+
+
+def get_raw_serializer(block):
+    """
+    Return the compiled raw serializer for a block definition.
+
+    Raw serializers are called as serializer(raw, resolver, container, key)
+    and write their output to container[key].
+    """
+    try:
+        cached_block, serializer = _raw_block_serializers[id(block)]
+    except KeyError:
+        pass
+    else:
+        if cached_block is block:
+            return serializer
+
+    serializer = compile_raw_block(block)
+    _raw_block_serializers[id(block)] = (block, serializer)
+    return serializer
+
+
+@receiver(setting_changed)
+def clear_raw_serializers(setting, **kwargs):
+    # Rendition sets are looked up when raw serializers are compiled
+    if setting in ('API_IMAGE_RENDITION_SETS', 'API_IMAGE_RENDITION_CONTEXTS'):
+        _raw_block_serializers.clear()
+
+
+def _converts_like(block, base_class):
+    """Whether block turns raw data into values exactly like base_class does"""
+    block_class = type(block)
+    return (
+        block_class.to_python is base_class.to_python
+        and block_class.bulk_to_python is base_class.bulk_to_python
+    )
+
+
+def compile_raw_block(block, path=()):
+    """
+    Build a function that serializes the raw JSON data of the given block.
+
+    path holds the block names leading to block from the top of the
+    StreamField; list items do not add to it. It selects the rendition set of
+    images, e.g. ('content_boxes', 'boxes', 'image').
+    """
+    if isinstance(block, blocks.BaseStreamBlock) and _converts_like(block, blocks.BaseStreamBlock):
+        return _compile_raw_stream_block(block, path)
+    if isinstance(block, blocks.BaseStructBlock) and _converts_like(block, blocks.BaseStructBlock):
+        return _compile_raw_struct_block(block, path)
+    if isinstance(block, blocks.ListBlock) and _converts_like(block, blocks.ListBlock):
+        return _compile_raw_list_block(block, path)
+    if isinstance(block, blocks.RichTextBlock) and _converts_like(block, blocks.RichTextBlock):
+        return _write_raw_rich_text
+    if isinstance(block, ImageChooserBlock) and _converts_like(block, blocks.ChooserBlock):
+        return _compile_raw_image_block(block, path)
+    if isinstance(block, blocks.ChooserBlock) and _converts_like(block, blocks.ChooserBlock):
+        return _compile_raw_chooser_block(block)
+    if isinstance(block, blocks.RawHTMLBlock) and _converts_like(block, blocks.RawHTMLBlock):
+        # to_python only marks the string as safe
+        return _write_raw_scalar
+    if isinstance(block, SCALAR_BLOCKS) and _converts_like(block, blocks.Block):
+        return _write_raw_scalar
+
+    # Anything else (dates, embeds, custom blocks) goes through the block's
+    # own conversion and the value serializer
+    serializer = get_block_serializer(block)
+
+    def write(raw, resolver, container, key):
+        container[key] = serializer(block.to_python(raw))
+
+    return write
+
+
+def _compile_raw_stream_block(block, path):
+    child_serializers = {
+        name: compile_raw_block(child_block, path + (name,))
+        for name, child_block in block.child_blocks.items()
+    }
+
+    def write(raw, resolver, container, key):
+        items = []
+        container[key] = items
+        if not raw:
+            return
+
+        for raw_child in raw:
+            block_type = raw_child['type']
+            child_serializer = child_serializers.get(block_type)
+            if child_serializer is None:
+                # Unknown block types are dropped, as StreamBlock.to_python does
+                continue
+
+            item = {'type': block_type, 'value': None, 'id': str(raw_child.get('id'))}
+            items.append(item)
+            child_serializer(raw_child['value'], resolver, item, 'value')
+
+    return write
+
+
+def _compile_raw_struct_block(block, path):
+    children = [
+        (name, compile_raw_block(child_block, path + (name,)), child_block)
+        for name, child_block in block.child_blocks.items()
+    ]
+
+    def write(raw, resolver, container, key):
+        value = {}
+        container[key] = value
+        for name, child_serializer, child_block in children:
+            if name in raw:
+                child_serializer(raw[name], resolver, value, name)
+            else:
+                # Missing values fall back to the child block's default,
+                # which is already a native value
+                value[name] = get_block_serializer(child_block)(child_block.get_default())
+
+    return write
+
+
+def _compile_raw_list_block(block, path):
+    child_serializer = compile_raw_block(block.child_block, path)
+
+    def write(raw, resolver, container, key):
+        items = [None] * len(raw)
+        container[key] = items
+        for i, item in enumerate(raw):
+            # List items are stored either as bare values or, since Wagtail
+            # 2.16, as {'type': 'item', 'value': ..., 'id': ...}
+            if (
+                isinstance(item, dict)
+                and item.get('type') == 'item'
+                and 'id' in item
+                and 'value' in item
+            ):
+                item = item['value']
+            child_serializer(item, resolver, items, i)
+
+    return write
+
+
+def _compile_raw_chooser_block(block):
+    serializer = get_block_serializer(block)
+    model = block.model_class
+
+    def write(raw, resolver, container, key):
+        container[key] = None
+        if raw is not None:
+            resolver.add_object(model, raw, container, key, serializer)
+
+    return write
+
+
+def _compile_raw_image_block(block, path):
+    rendition_set = get_rendition_set('.'.join(path))
+
+    def write(raw, resolver, container, key):
+        container[key] = None
+        if raw is not None:
+            resolver.add_image(raw, container, key, rendition_set)
+
+    return write
+
+
+def _write_raw_scalar(raw, resolver, container, key):
+    if raw is None or isinstance(raw, SCALAR_TYPES):
+        container[key] = raw
+    else:
+        container[key] = serialize_value(raw)
+
+
+def _write_raw_rich_text(raw, resolver, container, key):
+    container[key] = None
+    resolver.add_rich_text(raw, container, key)
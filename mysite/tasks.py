@@ -0,0 +1,27 @@
+from django_tasks import task
+from wagtail.images.models import Image
+
+from mysite.navigation_tree import build_navigation_tree
+from mysite.snapshots import build_snapshot
+
+
+@task()
+def generate_renditions_task(image_id, filter_specs):
+    image = Image.objects.filter(pk=image_id).first()
+    if image is None:
+        return
+
+    # Creates whichever of the renditions do not exist yet. Cached payloads
+    # are left as they are and list the renditions once they are next built
+    image.get_renditions(*filter_specs)
+
+
+@task()
+def build_snapshots_task(page_ids):
+    for page_id in page_ids:
+        build_snapshot(page_id)
+
+
+@task()
+def build_navigation_tree_task():
+    build_navigation_tree()
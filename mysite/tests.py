@@ -0,0 +1,1746 @@
+import base64
+import datetime
+import json
+import os
+import tempfile
+import uuid
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django_tasks import default_task_backend
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from content.models import AdvancedFlexiblePage, FlexiblePage
+from faq.models import FAQCategory, FAQCollection, FAQCollectionItem, FAQItem
+from footer.models import Footer, FooterColumn, FooterLink, SocialMediaLink
+from home.models import HomePage, HTMLPage
+from navigation.models import MegaMenu, MenuItem, NavigationMenu, SubMenuItem
+from team.models import Department, ExpertiseArea, Role, TeamMember, TeamMemberSocialLink
+from mysite.management.commands.benchmark_api import build_home_content
+from mysite.breadcrumbs import get_breadcrumbs
+from mysite.cache import (
+    CONTENT_VERSION_KEY,
+    bump_content_version,
+    finish_request,
+    get_content_version,
+    start_request,
+)
+from mysite.exports import export_api
+from mysite.images import get_rendition_set
+from mysite.models import PageSnapshot
+from mysite.page_plans import PagePlan, load_page, render_page
+from mysite.renderers import FastJSONRenderer, orjson
+from mysite.rich_text import expand_db_html_many
+from mysite.tasks import generate_renditions_task
+from mysite.api import (
+    CustomPagesAPIViewSet,
+    MegaMenuAPIViewSet,
+    StreamFieldSerializer,
+    api_router,
+    page_cache_stats,
+    serializer_registry,
+)
+from mysite.streamfield import (
+    ReferenceResolver,
+    serialize_raw_stream,
+    serialize_stream,
+    serialize_value,
+)
+
+from wagtail.images.models import Image
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page, PageViewRestriction
+from wagtail.rich_text import expand_db_html
+from wagtail.test.utils import WagtailPageTestCase
+
+
+# Query counts below are for a cache that costs no queries of its own,
+# whichever cache the settings configure
+local_cache = override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+})
+
+
+def setUpModule():
+    local_cache.enable()
+
+
+def tearDownModule():
+    local_cache.disable()
+
+
+class SerializerRegistryTests(WagtailPageTestCase):
+    """
+    Tests for the per-page-type serializer registry used by the pages endpoint.
+    """
+
+    def setUp(self):
+        serializer_registry.clear()
+
+    def get_serializer_class(self, **params):
+        request = RequestFactory().get("/api/v2/pages/", params)
+        request.wagtailapi_router = api_router
+        view = CustomPagesAPIViewSet(request=Request(request), action="listing_view", format_kwarg=None)
+        return view.get_serializer_class()
+
+    def test_stream_fields_read_from_meta(self):
+        self.assertEqual(
+            serializer_registry.get_stream_field_names(HomePage),
+            frozenset(["content_sections"]),
+        )
+
+    def test_stream_fields_use_stream_field_serializer(self):
+        serializer_class = self.get_serializer_class(type="home.HomePage", fields="*")
+        fields = serializer_class().get_fields()
+        self.assertIsInstance(fields["content_sections"], StreamFieldSerializer)
+
+    def test_serializer_class_is_built_once(self):
+        params = {"type": "home.HomePage", "fields": "*"}
+        url = "/api/v2/pages/?type=home.HomePage&fields=*"
+        build = CustomPagesAPIViewSet._build_serializer_class
+
+        with mock.patch.object(
+            CustomPagesAPIViewSet, "_build_serializer_class", autospec=True, side_effect=build,
+        ) as build_mock:
+            # The first request also loads the site root paths
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as first:
+                self.client.get(url)
+
+            for _ in range(10000):
+                self.get_serializer_class(**params)
+
+            with CaptureQueriesContext(connection) as last:
+                self.client.get(url)
+
+        # Nothing is built again or piles up, so the 10,000th request costs
+        # as much as the first one
+        self.assertEqual(build_mock.call_count, 1)
+        self.assertEqual(len(serializer_registry._serializers), 1)
+        self.assertEqual(len(last), len(first))
+        self.assertNotIn("get_fields", vars(self.get_serializer_class(**params)))
+
+    def test_fields_parameter_gets_its_own_serializer(self):
+        full = self.get_serializer_class(type="home.HomePage", fields="*")
+        sparse = self.get_serializer_class(type="home.HomePage", fields="hero_title")
+        self.assertIsNot(full, sparse)
+        self.assertNotIn("content_sections", sparse.Meta.fields)
+
+
+class CompiledStreamFieldTests(WagtailPageTestCase):
+    """
+    Tests that compiled StreamField serializers match the generic serializer.
+    """
+
+    def test_output_is_identical(self):
+        page = HomePage(title="Home", content_sections=build_home_content(2))
+        self.assertEqual(
+            json.dumps(serialize_stream(page.content_sections)),
+            json.dumps(serialize_value(page.content_sections)),
+        )
+
+    def test_stream_field_serializer_uses_compiled_plan(self):
+        page = HomePage(title="Home", content_sections=build_home_content(1))
+        data = StreamFieldSerializer().to_representation(page.content_sections)
+        self.assertEqual(data[0]["type"], "stats_section")
+        self.assertEqual(data[0]["id"], "stats-0")
+        self.assertEqual(data[3]["value"]["news_items"][0]["date"], "2025-01-01")
+
+
+@override_settings(API_IMAGE_RENDITION_SETS={})
+class RawStreamFieldTests(WagtailPageTestCase):
+    """
+    Differential tests: serializing the raw stored JSON must give exactly the
+    same output as serializing deserialized block values. Rendition sets are
+    turned off, as only the raw path adds them.
+    """
+
+    def setUp(self):
+        self.image = Image.objects.create(title="Test image", file=get_test_image_file())
+        self.page = Page.objects.get(slug="home")
+        self.missing_image_id = self.image.id + 1000
+        self.rich_text = (
+            '<p>See <a linktype="page" id="%d">the homepage</a> and '
+            '<a href="https://example.com">elsewhere</a>.</p>'
+            '<embed embedtype="image" id="%d" format="left" alt="An image"/>'
+        ) % (self.page.id, self.image.id)
+
+    def assertRawOutputMatches(self, value):
+        expected = json.dumps(serialize_value(value))
+
+        resolver = ReferenceResolver()
+        data = serialize_raw_stream(value, resolver)
+        resolver.resolve()
+
+        self.assertEqual(json.dumps(data), expected)
+        self.assertEqual(json.dumps(serialize_stream(value)), expected)
+
+    def test_home_page(self):
+        content = build_home_content(1) + [
+            {'type': 'content_boxes', 'id': 'boxes-images', 'value': {
+                'title': 'With images',
+                'boxes': [
+                    {'type': 'item', 'id': 'box-1', 'value': {
+                        'title': 'Box', 'content': self.rich_text, 'image': self.image.id,
+                        'link_text': 'More', 'link_url': 'https://example.com',
+                    }},
+                    {'type': 'item', 'id': 'box-2', 'value': {
+                        'title': 'Missing image', 'content': '', 'image': self.missing_image_id,
+                    }},
+                ],
+            }},
+            {'type': 'news_section', 'id': 'news-images', 'value': {
+                'news_items': [
+                    {'title': 'News', 'date': '2025-02-03', 'summary': self.rich_text,
+                     'image': self.image.id, 'category': 'General'},
+                    {'title': 'Undated', 'date': None, 'summary': None, 'image': None},
+                ],
+            }},
+            {'type': 'rich_content_section', 'id': 'rich-images', 'value': {
+                'title': None,
+                'content': [
+                    {'type': 'image', 'id': 'i-1', 'value': {
+                        'image': self.image.id, 'caption': 'Caption', 'alt_text': 'Alt',
+                    }},
+                    {'type': 'quote', 'id': 'q-1', 'value': 'Quote'},
+                    {'type': 'embed', 'id': 'e-1', 'value': 'https://www.youtube.com/watch?v=1'},
+                    {'type': 'removed_block', 'id': 'r-1', 'value': 'Dropped'},
+                ],
+            }},
+            {'type': 'custom_html', 'id': 'html-1', 'value': '<div>Raw</div>'},
+        ]
+        page = HomePage(title="Home", content_sections=content)
+        self.assertRawOutputMatches(page.content_sections)
+
+    def test_flexible_page(self):
+        page = FlexiblePage(title="Flexible", content=[
+            {'type': 'heading', 'id': 'h', 'value': 'Heading'},
+            {'type': 'paragraph', 'id': 'p', 'value': self.rich_text},
+            {'type': 'image', 'id': 'i', 'value': self.image.id},
+            {'type': 'image', 'id': 'i-missing', 'value': self.missing_image_id},
+            {'type': 'html', 'id': 'html', 'value': '<span>Raw</span>'},
+            {'type': 'quote', 'id': 'q', 'value': 'Quote'},
+            {'type': 'list', 'id': 'l', 'value': ['one', 'two']},
+            {'type': 'list_with_links', 'id': 'lwl', 'value': {
+                'title': 'Links',
+                'items': [
+                    {'text': 'Old format', 'link': '/about'},
+                    {'type': 'item', 'id': 'new', 'value': {'text': 'New format', 'link': ''}},
+                ],
+            }},
+        ])
+        self.assertRawOutputMatches(page.content)
+
+    def test_advanced_flexible_page(self):
+        page = AdvancedFlexiblePage(title="Advanced", body=[
+            {'type': 'heading', 'id': 'h', 'value': {'text': 'Heading', 'level': 'h3'}},
+            {'type': 'heading', 'id': 'h-default', 'value': {'text': 'Default level'}},
+            {'type': 'paragraph', 'id': 'p', 'value': self.rich_text},
+            {'type': 'image', 'id': 'i', 'value': {'image': self.image.id, 'caption': '', 'alt_text': 'Alt'}},
+            {'type': 'quote', 'id': 'q', 'value': {'quote': 'Quote', 'author': 'Author'}},
+            {'type': 'button', 'id': 'b', 'value': {'text': 'Go', 'url': 'https://example.com', 'style': 'outline'}},
+            {'type': 'two_columns', 'id': 'c', 'value': {
+                'left_column': [
+                    {'type': 'paragraph', 'id': 'lp', 'value': self.rich_text},
+                    {'type': 'image', 'id': 'li', 'value': self.image.id},
+                ],
+                'right_column': [
+                    {'type': 'image', 'id': 'ri', 'value': self.missing_image_id},
+                ],
+            }},
+            {'type': 'call_to_action', 'id': 'cta', 'value': {
+                'title': 'Title', 'text': self.rich_text, 'button_text': 'Go', 'button_url': 'https://example.com',
+            }},
+            {'type': 'list_with_links', 'id': 'lwl', 'value': {
+                'title': '', 'items': [{'type': 'item', 'id': 'x', 'value': {'text': 'Text', 'link': None}}],
+            }},
+        ])
+        self.assertRawOutputMatches(page.body)
+
+    def test_footer(self):
+        footer = Footer(title="Footer", content_sections=[
+            {'type': 'text_section', 'id': 't', 'value': {'title': 'About', 'content': self.rich_text}},
+            {'type': 'link_list', 'id': 'l', 'value': {
+                'title': 'Links',
+                'links': [{'text': 'Home', 'url': 'https://example.com', 'open_in_new_tab': True}],
+            }},
+            {'type': 'image_section', 'id': 'i', 'value': {'image': self.image.id, 'alt_text': 'Alt'}},
+            {'type': 'contact_info', 'id': 'c', 'value': {
+                'items': [{'label': 'Email', 'value': 'hello@example.com', 'icon': ''}],
+            }},
+            {'type': 'newsletter_signup', 'id': 'n', 'value': {'action_url': 'https://example.com/subscribe'}},
+            {'type': 'custom_html', 'id': 'html', 'value': '<hr>'},
+        ])
+        self.assertRawOutputMatches(footer.content_sections)
+
+    def test_mega_menu(self):
+        menu = MegaMenu(title="Mega", slug="mega", menu_items=[
+            {'type': 'menu_item', 'id': 'm', 'value': {
+                'title': 'Home',
+                'link_page': self.page.id,
+                'link_url': '',
+                'open_in_new_tab': False,
+                'sub_items': [
+                    {'type': 'item', 'id': 's1', 'value': {
+                        'title': 'Sub', 'link_page': self.page.id, 'link_url': '', 'description': 'Desc',
+                    }},
+                    {'type': 'item', 'id': 's2', 'value': {
+                        'title': 'Gone', 'link_page': 99999, 'link_url': 'https://example.com',
+                    }},
+                ],
+            }},
+        ])
+        self.assertRawOutputMatches(menu.menu_items)
+
+    @override_settings(API_STREAMFIELD_RAW_MODE=True)
+    def test_references_are_loaded_in_bulk(self):
+        images = [Image.objects.create(title="Image %d" % i, file=get_test_image_file()) for i in range(5)]
+        page = FlexiblePage(title="Flexible", content=[
+            {'type': 'image', 'id': str(image.id), 'value': image.id} for image in images
+        ])
+
+        with self.assertNumQueries(1):
+            data = StreamFieldSerializer().to_representation(page.content)
+
+        self.assertEqual([item['value']['id'] for item in data], [image.id for image in images])
+
+
+@override_settings(TASKS={'default': {'BACKEND': 'django_tasks.backends.dummy.DummyBackend'}})
+class BulkImageLoadingTests(WagtailPageTestCase):
+    """
+    Tests that every image in a page payload is loaded with a single query.
+    """
+
+    def setUp(self):
+        self.home = Page.objects.get(slug="home")
+        cache.clear()
+
+    def create_home_page(self, slug, image_count):
+        images = [
+            Image.objects.create(title="Image %d" % i, file=get_test_image_file())
+            for i in range(image_count)
+        ]
+        content = [
+            {'type': 'content_boxes', 'id': 'boxes', 'value': {
+                'title': 'Boxes',
+                'boxes': [
+                    {'title': 'Box', 'content': '<p>Box</p>', 'image': image.id}
+                    for image in images
+                ],
+            }},
+            {'type': 'news_section', 'id': 'news', 'value': {
+                'section_title': 'News',
+                'news_items': [
+                    {'title': 'News', 'summary': '<p>News</p>', 'image': image.id}
+                    for image in images
+                ],
+            }},
+            {'type': 'rich_content_section', 'id': 'rich', 'value': {
+                'title': 'Rich',
+                'content': [
+                    {'type': 'image', 'id': 'image-%d' % image.id, 'value': {'image': image.id}}
+                    for image in images
+                ],
+            }},
+        ]
+        page = HomePage(title=slug, slug=slug, hero_image=images[0], content_sections=content)
+        self.home.add_child(instance=page)
+        return page
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.json()
+
+    def test_page_by_slug_query_count_is_constant(self):
+        self.create_home_page("one-image", 1)
+        self.create_home_page("many-images", 12)
+
+        few_queries, _ = self.count_queries("/api/v2/page-by-slug/?slug=one-image")
+        many_queries, data = self.count_queries("/api/v2/page-by-slug/?slug=many-images")
+
+        self.assertEqual(many_queries, few_queries)
+        self.assertEqual(data["hero_image"]["title"], "Image 0")
+        self.assertEqual(len(data["content_sections"][0]["value"]["boxes"]), 12)
+        self.assertEqual(data["content_sections"][2]["value"]["content"][11]["value"]["image"]["title"], "Image 11")
+
+    def test_pages_listing_query_count_is_constant(self):
+        self.create_home_page("first", 1)
+        url = "/api/v2/pages/?type=home.HomePage&fields=content_sections"
+        few_queries, _ = self.count_queries(url)
+
+        self.create_home_page("second", 12)
+        self.create_home_page("third", 12)
+        many_queries, data = self.count_queries(url)
+
+        self.assertEqual(many_queries, few_queries)
+        self.assertEqual(data["items"][-1]["content_sections"][0]["value"]["boxes"][0]["image"]["title"], "Image 0")
+
+
+@override_settings(TASKS={'default': {'BACKEND': 'django_tasks.backends.dummy.DummyBackend'}})
+class RenditionSetTests(WagtailPageTestCase):
+    """
+    Tests responsive rendition sets in image payloads.
+    """
+
+    def setUp(self):
+        # 640x480, so the 960 wide content box rendition is not upscaled
+        self.image = Image.objects.create(title="Test image", file=get_test_image_file())
+        self.home = Page.objects.get(slug="home")
+        default_task_backend.clear()
+        cache.clear()
+
+    def serialize_content_box(self):
+        page = HomePage(title="Home", content_sections=[
+            {'type': 'content_boxes', 'id': 'boxes', 'value': {
+                'title': 'Boxes',
+                'boxes': [{'title': 'Box', 'content': '<p>Box</p>', 'image': self.image.id}],
+            }},
+        ])
+        data = StreamFieldSerializer().to_representation(page.content_sections)
+        return data[0]['value']['boxes'][0]['image']
+
+    def test_existing_renditions_are_listed(self):
+        rendition_set = get_rendition_set('content_boxes.boxes.image')
+        self.image.get_renditions(*rendition_set.filter_specs)
+        renditions = self.image.get_renditions(*rendition_set.filter_specs)
+
+        # One query for the images and one for their renditions
+        with self.assertNumQueries(2):
+            image = self.serialize_content_box()
+
+        self.assertEqual(image['url'], self.image.file.url)
+        self.assertEqual(image['srcset'], '%s 320w, %s 640w' % (
+            renditions['width-320'].url, renditions['width-640'].url,
+        ))
+        self.assertEqual(image['sources'], [{
+            'type': 'image/webp',
+            'srcset': '%s 320w, %s 640w' % (
+                renditions['width-320|format-webp'].url, renditions['width-640|format-webp'].url,
+            ),
+        }])
+        self.assertEqual(image['sizes'], '(min-width: 768px) 33vw, 100vw')
+        self.assertEqual(default_task_backend.results, [])
+
+    def test_missing_renditions_are_generated_in_the_background(self):
+        rendition_set = get_rendition_set('content_boxes.boxes.image')
+
+        image = self.serialize_content_box()
+
+        self.assertEqual(image['srcset'], '')
+        self.assertEqual(self.image.renditions.count(), 0)
+        self.assertEqual(len(default_task_backend.results), 1)
+        result = default_task_backend.results[0]
+        self.assertEqual(result.task, generate_renditions_task)
+        self.assertEqual(result.args, [self.image.id, sorted(rendition_set.filter_specs)])
+
+        generate_renditions_task.call(*result.args)
+
+        image = self.serialize_content_box()
+        self.assertEqual(len(image['srcset'].split(', ')), 2)
+        self.assertEqual(len(image['sources'][0]['srcset'].split(', ')), 2)
+
+    def test_hero_image_uses_hero_set(self):
+        self.home.add_child(instance=HomePage(title="Hero", slug="hero", hero_image=self.image))
+
+        response = self.client.get("/api/v2/page-by-slug/?slug=hero")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["hero_image"]["sizes"], "100vw")
+        self.assertEqual(len(default_task_backend.results), 1)
+
+    @override_settings(API_IMAGE_RENDITION_CONTEXTS={})
+    def test_unlisted_paths_use_default_set(self):
+        image = self.serialize_content_box()
+
+        self.assertNotIn('sizes', image)
+        self.assertEqual(
+            default_task_backend.results[0].args[1],
+            sorted(get_rendition_set('default').filter_specs),
+        )
+
+    @override_settings(API_IMAGE_RENDITION_SETS={})
+    def test_no_rendition_sets(self):
+        image = self.serialize_content_box()
+
+        self.assertEqual(set(image), {'id', 'title', 'url', 'width', 'height'})
+        self.assertEqual(default_task_backend.results, [])
+
+
+class RequestVersionTests(WagtailPageTestCase):
+    """
+    Tests that versions are read from the cache once per request.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_read_once_per_request(self):
+        start_request()
+        try:
+            version = get_content_version()
+            # Bumped by another process
+            cache.set(CONTENT_VERSION_KEY, version + 10)
+            self.assertEqual(get_content_version(), version)
+
+            # Read again after a bump of this request's own
+            bump_content_version()
+            self.assertEqual(get_content_version(), version + 11)
+        finally:
+            finish_request()
+
+        cache.set(CONTENT_VERSION_KEY, version + 20)
+        self.assertEqual(get_content_version(), version + 20)
+
+    def test_cached_response_reads_versions_once(self):
+        self.client.get("/api/v2/mega_menus/")
+        with mock.patch("mysite.cache.cache") as mock_cache:
+            mock_cache.get.side_effect = cache.get
+            self.client.get("/api/v2/mega_menus/")
+        keys = [call.args[0] for call in mock_cache.get.call_args_list]
+        self.assertEqual(keys.count(CONTENT_VERSION_KEY), 1)
+
+
+class PageBySlugCacheTests(WagtailPageTestCase):
+    """
+    Tests the published payload cache of page_by_slug.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.home = Page.objects.get(slug="home")
+        self.section = self.home.add_child(instance=FlexiblePage(title="Section", slug="section"))
+        self.page = self.section.add_child(instance=FlexiblePage(
+            title="Cached", slug="cached", content=[{'type': 'heading', 'value': 'Hello'}],
+        ))
+        self.url = "/api/v2/page-by-slug/?slug=cached"
+
+    def get(self, expected_cache_status):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], expected_cache_status)
+        return response
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.get("MISS")
+        with self.assertNumQueries(2):
+            # Only the site and the page row are looked up
+            second = self.get("HIT")
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Type"], "application/json")
+        self.assertEqual(page_cache_stats.get(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_publishing_invalidates(self):
+        self.get("MISS")
+
+        self.page.title = "Updated"
+        self.page.save_revision().publish()
+
+        self.assertEqual(self.get("MISS").json()["title"], "Updated")
+        self.get("HIT")
+
+    def test_publishing_an_ancestor_invalidates(self):
+        self.get("MISS")
+
+        self.section.title = "Renamed section"
+        self.section.save_revision().publish()
+
+        breadcrumbs = self.get("MISS").json()["breadcrumbs"]
+        self.assertIn("Renamed section", [crumb["title"] for crumb in breadcrumbs])
+
+    def test_unpublishing_invalidates(self):
+        self.get("MISS")
+
+        self.page.unpublish()
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_moving_invalidates(self):
+        self.get("MISS")
+
+        self.page.move(self.home, pos="last-child")
+
+        data = self.get("MISS").json()
+        self.assertEqual(data["url_path"], "/home/cached/")
+
+    def test_deleting_a_page_invalidates(self):
+        other = self.home.add_child(instance=FlexiblePage(title="Other", slug="other"))
+        self.get("MISS")
+
+        other.delete()
+
+        self.get("MISS")
+
+    def test_stats_reset(self):
+        self.get("MISS")
+        page_cache_stats.reset()
+
+        self.assertEqual(page_cache_stats.get(), {'hits': 0, 'misses': 0, 'hit_rate': None})
+
+
+@override_settings(TASKS={'default': {'BACKEND': 'django_tasks.backends.dummy.DummyBackend'}})
+class PagePlanTests(WagtailPageTestCase):
+    """
+    Tests that page_by_slug loads each page type with a fixed number of
+    queries, set by its field plan.
+    """
+
+    # Building a payload that is not cached:
+    # page row, site, specific page, ancestors and site root paths for
+    # breadcrumb URLs
+    base_queries = 5
+
+    # Images and their renditions, when the page has any
+    image_queries = 2
+
+    def setUp(self):
+        cache.clear()
+        self.home = Page.objects.get(slug="home")
+        self.images = [
+            Image.objects.create(title="Image %d" % i, file=get_test_image_file())
+            for i in range(3)
+        ]
+
+    def get(self, page):
+        response = self.client.get("/api/v2/page-by-slug/?slug=%s" % page.slug)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        return response.json()
+
+    def test_plans_follow_api_fields(self):
+        plan = PagePlan(HomePage)
+
+        self.assertEqual([name for name, write in plan.fields], [field.name for field in HomePage.api_fields])
+        self.assertEqual(plan.select_related, [])
+        self.assertEqual(plan.prefetch_related, [])
+
+    def test_home_page(self):
+        page = self.home.add_child(instance=HomePage(
+            title="Planned home", slug="planned-home", hero_title="Hero",
+            hero_image=self.images[0], about_content="<p>About</p>",
+            content_sections=build_home_content(2) + [
+                {'type': 'content_boxes', 'id': 'boxes', 'value': {
+                    'title': 'Boxes',
+                    'boxes': [
+                        {'title': 'Box', 'content': '<p>Box</p>', 'image': image.id}
+                        for image in self.images
+                    ],
+                }},
+            ],
+        ))
+
+        with self.assertNumQueries(self.base_queries + self.image_queries):
+            data = self.get(page)
+
+        self.assertEqual(data["hero_title"], "Hero")
+        self.assertEqual(data["hero_image"]["id"], self.images[0].id)
+        self.assertEqual(data["about_content"], "<p>About</p>")
+        self.assertEqual(data["content_sections"][-1]["value"]["boxes"][2]["image"]["id"], self.images[2].id)
+        # Only api_fields are added to the page's own fields
+        self.assertNotIn("path", data)
+        self.assertNotIn("owner", data)
+
+    def test_html_page(self):
+        page = self.home.add_child(instance=HTMLPage(title="HTML", slug="html", body="<p>Body</p>"))
+
+        with self.assertNumQueries(self.base_queries):
+            data = self.get(page)
+
+        self.assertEqual(data["body"], "<p>Body</p>")
+        self.assertEqual([crumb["title"] for crumb in data["breadcrumbs"]], ["Root", "Home", "HTML"])
+
+    def test_flexible_page(self):
+        page = self.home.add_child(instance=FlexiblePage(title="Flexible", slug="flexible", content=[
+            {'type': 'heading', 'value': 'Heading'},
+            {'type': 'paragraph', 'value': '<p>Paragraph</p>'},
+            {'type': 'list', 'value': ['one', 'two']},
+        ] + [
+            {'type': 'image', 'value': image.id} for image in self.images
+        ]))
+
+        with self.assertNumQueries(self.base_queries + self.image_queries):
+            data = self.get(page)
+
+        self.assertEqual(len(data["content"]), 6)
+        self.assertEqual(data["breadcrumbs"][-1]["title"], "Flexible")
+
+    def test_advanced_flexible_page(self):
+        page = self.home.add_child(instance=AdvancedFlexiblePage(title="Advanced", slug="advanced", body=[
+            {'type': 'heading', 'value': {'text': 'Heading', 'level': 'h2'}},
+            {'type': 'image', 'value': {'image': self.images[0].id, 'caption': 'Caption'}},
+            {'type': 'two_columns', 'value': {
+                'left_column': [{'type': 'image', 'value': self.images[1].id}],
+                'right_column': [{'type': 'paragraph', 'value': '<p>Right</p>'}],
+            }},
+            {'type': 'button', 'value': {'text': 'Go', 'url': 'https://example.com', 'style': 'primary'}},
+        ]))
+
+        with self.assertNumQueries(self.base_queries + self.image_queries):
+            data = self.get(page)
+
+        self.assertEqual(data["body"][1]["value"]["image"]["id"], self.images[0].id)
+        self.assertEqual(data["body"][2]["value"]["left_column"][0]["value"]["id"], self.images[1].id)
+
+
+class BreadcrumbTests(WagtailPageTestCase):
+    """
+    Tests the shared breadcrumb service.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.home = Page.objects.get(slug="home")
+
+    def create_tree(self, depth):
+        page = self.home
+        for level in range(depth):
+            page = page.add_child(instance=FlexiblePage(title="Level %d" % level, slug="level-%d" % level))
+        return page
+
+    def wagtail_breadcrumbs(self, page):
+        return [
+            {'title': ancestor.title, 'url': ancestor.url, 'slug': ancestor.slug}
+            for ancestor in page.get_ancestors(inclusive=True).live().public()
+        ]
+
+    def test_matches_wagtail(self):
+        page = self.create_tree(3)
+
+        self.assertEqual(get_breadcrumbs(page), self.wagtail_breadcrumbs(page))
+        self.assertEqual(get_breadcrumbs(page)[-1]["url"], "/level-0/level-1/level-2/")
+
+    def test_query_count_does_not_depend_on_depth(self):
+        shallow = self.create_tree(1)
+        deep = self.home.add_child(instance=FlexiblePage(title="Deep", slug="deep"))
+        for level in range(8):
+            deep = deep.add_child(instance=FlexiblePage(title="Deep %d" % level, slug="deep-%d" % level))
+        cache.clear()
+
+        # Site root paths once per process, then one query per trail
+        with self.assertNumQueries(2):
+            get_breadcrumbs(shallow)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(get_breadcrumbs(deep)), 11)
+
+        # Memoized until content changes
+        with self.assertNumQueries(0):
+            get_breadcrumbs(deep)
+
+    def test_private_and_unpublished_ancestors_are_left_out(self):
+        page = self.create_tree(4)
+        private = Page.objects.get(slug="level-1")
+        draft = Page.objects.get(slug="level-0")
+        PageViewRestriction.objects.create(page=private, restriction_type="password", password="secret")
+        draft.unpublish()
+
+        self.assertEqual(
+            [crumb["slug"] for crumb in get_breadcrumbs(page)],
+            ["root", "home", "level-3"],
+        )
+
+    def test_moving_an_ancestor_updates_urls(self):
+        page = self.create_tree(2)
+        get_breadcrumbs(page)
+
+        Page.objects.get(slug="level-1").move(self.home, pos="last-child")
+        page.refresh_from_db()
+
+        self.assertEqual(get_breadcrumbs(page), self.wagtail_breadcrumbs(page))
+
+
+class ConditionalGetTests(WagtailPageTestCase):
+    """
+    Tests that unchanged API resources are answered with 304 Not Modified
+    before anything is serialized.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.home = Page.objects.get(slug="home")
+        self.page = self.home.add_child(instance=FlexiblePage(title="Conditional", slug="conditional"))
+        self.menu = NavigationMenu.objects.create(title="Main", slug="main")
+
+    def assertNotModified(self, url, response, queries):
+        with self.assertNumQueries(queries):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+        self.assertEqual(not_modified.content, b"")
+
+    def test_page_by_slug(self):
+        url = "/api/v2/page-by-slug/?slug=conditional"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["ETag"].startswith('"'))
+
+        # The page row and the site
+        self.assertNotModified(url, response, 2)
+
+        not_modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.page.title = "Changed"
+        self.page.save_revision().publish()
+
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], response["ETag"])
+        self.assertEqual(changed.json()["title"], "Changed")
+
+    def test_pages_listing(self):
+        url = "/api/v2/pages/?type=content.FlexiblePage"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertNotModified(url, response, 0)
+
+        self.page.save_revision().publish()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_pages_detail(self):
+        page = self.home.add_child(instance=HTMLPage(title="HTML", slug="html", body="<p>Body</p>"))
+        url = "/api/v2/pages/%d/" % page.id
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        # The page's revision and publish time
+        self.assertNotModified(url, response, 1)
+
+    def test_navigation_menus(self):
+        url = "/api/v2/navigation_menus/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        # Served from the materialized navigation tree
+        self.assertNotModified(url, response, 0)
+
+        self.menu.title = "Renamed"
+        self.menu.save()
+
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["items"][0]["title"], "Renamed")
+
+
+class SnippetAPITestCase(WagtailPageTestCase):
+    """
+    Base for tests of snippet endpoints, with num_pages pages for snippets to
+    link to.
+    """
+
+    num_pages = 0
+
+    def setUp(self):
+        cache.clear()
+        home = Page.objects.get(slug="home")
+        self.pages = [
+            home.add_child(instance=HTMLPage(title="Linked %d" % i, slug="linked-%d" % i))
+            for i in range(self.num_pages)
+        ]
+
+    def assertConstantQueries(self, url, add_objects):
+        """
+        Assert that url costs as many queries once add_objects() has added
+        more of what it serves. Returns the JSON of the last response.
+        """
+        # Renditions are created on the first request
+        self.client.get(url)
+
+        num_queries = []
+        for step in [lambda: None, add_objects]:
+            step()
+            # Served as it is built, not from the cache
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            num_queries.append(len(queries))
+
+        self.assertEqual(num_queries[1], num_queries[0])
+        return response.json()
+
+
+class NavigationMenuQueryTests(SnippetAPITestCase):
+    """
+    Tests that navigation menu links are resolved without a query per link.
+    """
+
+    num_pages = 10
+    # Parameters bypass the materialized tree
+    url = "/api/v2/navigation_menus/?limit=20"
+
+    def add_menu(self, i, items, sub_items):
+        menu = NavigationMenu.objects.create(title="Menu %d" % i, slug="menu-%d" % i, link_page=self.pages[i])
+        for j in range(items):
+            item = MenuItem.objects.create(
+                menu=menu, title="Item %d" % j, link_page=self.pages[j % 10], sort_order=j
+            )
+            for k in range(sub_items):
+                SubMenuItem.objects.create(parent_item=item, title="Sub-item %d" % k, link_page=self.pages[k % 10])
+        return menu
+
+    def test_constant_queries(self):
+        self.add_menu(0, 1, 1)
+        # 4 menus with 10 items of 4 sub-items each link to 204 pages
+        self.assertConstantQueries(self.url, lambda: [self.add_menu(i, 10, 4) for i in range(1, 4)])
+
+    def test_links(self):
+        menu = self.add_menu(0, 1, 1)
+        MenuItem.objects.create(menu=menu, title="External", link_url="https://example.com/", sort_order=1)
+
+        menu_data = self.client.get(self.url).json()["items"][0]
+        self.assertEqual(menu_data["link"], self.pages[0].url)
+        self.assertEqual(menu_data["menu_items"][0]["link"], self.pages[0].url)
+        self.assertEqual(menu_data["menu_items"][0]["sub_items"][0]["link"], self.pages[0].url)
+        self.assertEqual(menu_data["menu_items"][1]["link"], "https://example.com/")
+
+
+class NavigationTreeTests(WagtailPageTestCase):
+    """
+    Tests the materialized navigation tree.
+    """
+
+    def setUp(self):
+        cache.clear()
+        home = Page.objects.get(slug="home")
+        self.page = home.add_child(instance=HTMLPage(title="Linked", slug="linked"))
+        self.other_page = home.add_child(instance=HTMLPage(title="Other", slug="other"))
+        self.menu = NavigationMenu.objects.create(title="Main", slug="main")
+        MenuItem.objects.create(menu=self.menu, title="Linked", link_page=self.page)
+        self.url = "/api/v2/navigation_menus/"
+
+    def test_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.content, first.content)
+        self.assertEqual(response.json(), self.client.get(self.url + "?limit=20").json())
+
+    def test_rebuilt_on_menu_save(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu.title = "Renamed"
+            self.menu.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.json()["items"][0]["title"], "Renamed")
+
+    def test_queued_once_per_commit(self):
+        with mock.patch("mysite.tasks.build_navigation_tree_task") as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(3):
+                    MenuItem.objects.create(menu=self.menu, title="Item %d" % i, link_page=self.other_page)
+        self.assertEqual(task.enqueue.call_count, 1)
+
+    def test_rebuilt_on_linked_page_publish(self):
+        response = self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.page.slug = "renamed"
+            self.page.save_revision().publish()
+
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed["X-Cache"], "HIT")
+        self.assertEqual(changed.json()["items"][0]["menu_items"][0]["link"], "/renamed/")
+
+    def test_other_pages_keep_tree(self):
+        response = self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_page.save_revision().publish()
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_linked_page_deleted(self):
+        self.menu.link_page = self.other_page
+        self.menu.save()
+        response = self.client.get(self.url)
+
+        self.other_page.delete()
+
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["items"][0]["link"], "")
+
+
+class MegaMenuAPITests(SnippetAPITestCase):
+    """
+    Tests the mega menus endpoint.
+    """
+
+    num_pages = 10
+    url = "/api/v2/mega_menus/"
+
+    def add_menu(self, i, items, sub_items):
+        return MegaMenu.objects.create(title="Mega %d" % i, slug="mega-%d" % i, menu_items=[
+            {'type': 'menu_item', 'value': {
+                'title': 'Item %d' % j,
+                'link_page': self.pages[j % 10].id,
+                'link_url': '',
+                'sub_items': [
+                    {'title': 'Sub-item %d' % k, 'link_page': self.pages[k % 10].id, 'link_url': ''}
+                    for k in range(sub_items)
+                ],
+            }}
+            for j in range(items)
+        ])
+
+    def test_page_links(self):
+        MegaMenu.objects.create(title="Mega", slug="mega", menu_items=[
+            {'type': 'menu_item', 'value': {
+                'title': 'Item',
+                'link_page': self.pages[0].id,
+                'link_url': '',
+                'sub_items': [{'title': 'Gone', 'link_page': 99999, 'link_url': 'https://example.com'}],
+            }},
+        ])
+
+        data = self.client.get(self.url).json()
+        item = data["items"][0]["menu_items"][0]["value"]
+        self.assertEqual(item["link_page"], {"id": self.pages[0].id, "title": "Linked 0", "url": "/linked-0/"})
+        self.assertIsNone(item["sub_items"][0]["link_page"])
+        self.assertEqual(data, self.client.get(self.url + "?limit=20").json())
+
+    def test_constant_queries(self):
+        self.add_menu(0, 1, 1)
+        self.assertConstantQueries(self.url + "?limit=20", lambda: [self.add_menu(i, 10, 4) for i in range(1, 4)])
+
+    def test_not_modified_before_document(self):
+        self.add_menu(0, 1, 1)
+        etag = self.client.get(self.url)["ETag"]
+        with mock.patch.object(MegaMenuAPIViewSet, "get_listing_document") as get_listing_document:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        get_listing_document.assert_not_called()
+
+    def test_cached_document(self):
+        self.add_menu(0, 2, 2)
+        first = self.client.get(self.url)
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.content, first.content)
+
+        self.add_menu(1, 1, 1)
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["meta"]["total_count"], 2)
+
+
+class FooterAPITests(SnippetAPITestCase):
+    """
+    Tests the footers endpoint.
+    """
+
+    num_pages = 5
+    url = "/api/v2/footers/"
+
+    def add_footer(self, title, columns, links):
+        footer = Footer.objects.create(title=title, content_sections=[
+            {'type': 'text_section', 'value': {'title': 'About', 'content': '<p>About us</p>'}},
+        ])
+        for i in range(columns):
+            column = FooterColumn.objects.create(footer=footer, title="Column %d" % i, sort_order=i)
+            for j in range(links):
+                FooterLink.objects.create(column=column, title="Link %d" % j, link_page=self.pages[j % 5], sort_order=j)
+            FooterLink.objects.create(column=column, title="External", link_url="https://example.com/", sort_order=links)
+        SocialMediaLink.objects.create(footer=footer, platform="github", url="https://github.com/example")
+        return footer
+
+    def test_footers(self):
+        self.add_footer("Main footer", 1, 1)
+
+        data = self.client.get(self.url).json()
+        footer = data["items"][0]
+        links = footer["footer_columns"][0]["column_links"]
+        self.assertEqual(links[0]["link"], "/linked-0/")
+        self.assertEqual(links[0]["link_page"], {"id": self.pages[0].id, "title": "Linked 0", "url": "/linked-0/"})
+        self.assertEqual(links[1]["link"], "https://example.com/")
+        self.assertEqual(footer["social_links"][0]["label"], "GitHub")
+        self.assertEqual(footer["content_sections"][0]["value"]["content"], "<p>About us</p>")
+        self.assertEqual(data, self.client.get(self.url + "?limit=20").json())
+
+    def test_constant_queries(self):
+        self.add_footer("Main footer", 1, 1)
+        self.assertConstantQueries(self.url + "?limit=20", lambda: self.add_footer("Other footer", 5, 10))
+
+    def test_cached_document(self):
+        footer = self.add_footer("Main footer", 2, 2)
+        first = self.client.get(self.url)
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "HIT")
+
+        footer.title = "Renamed footer"
+        footer.save()
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["items"][0]["title"], "Renamed footer")
+
+        # Linked pages change the document too
+        self.pages[0].slug = "renamed"
+        self.pages[0].save_revision().publish()
+        links = self.client.get(self.url).json()["items"][0]["footer_columns"][0]["column_links"]
+        self.assertEqual(links[0]["link"], "/renamed/")
+
+
+class TeamMemberAPITests(SnippetAPITestCase):
+    """
+    Tests the team members endpoint.
+    """
+
+    url = "/api/v2/team_members/"
+
+    def setUp(self):
+        super().setUp()
+        self.department = Department.objects.create(name="Engineering")
+        self.role = Role.objects.create(name="Engineer")
+        self.image = Image.objects.create(title="Photo", file=get_test_image_file())
+
+    def add_member(self, i, **kwargs):
+        member = TeamMember.objects.create(
+            first_name="Member", last_name=str(i), photo=self.image, bio="<p>Bio %d</p>" % i,
+            role=self.role, department=self.department, **kwargs
+        )
+        TeamMemberSocialLink.objects.create(team_member=member, platform="github", url="https://github.com/%d" % i)
+        ExpertiseArea.objects.create(team_member=member, name="Python", proficiency_level="expert")
+        return member
+
+    def test_team_members(self):
+        self.add_member(0, is_author=True)
+
+        data = self.client.get(self.url).json()
+        member = data["items"][0]
+        self.assertEqual(member["title"], "Engineer")
+        self.assertEqual(member["department"]["name"], "Engineering")
+        self.assertEqual(member["bio"], "<p>Bio 0</p>")
+        self.assertEqual(member["photo"]["id"], self.image.id)
+        self.assertEqual(member["social_links"][0]["label"], "GitHub")
+        self.assertEqual(member["expertise_areas"][0]["name"], "Python")
+        self.assertEqual(data, self.client.get(self.url + "?limit=20").json())
+
+    def test_constant_queries(self):
+        self.add_member(0)
+        data = self.assertConstantQueries(
+            self.url + "?is_active=true", lambda: [self.add_member(i) for i in range(1, 10)]
+        )
+        self.assertEqual(len(data["items"]), 10)
+
+    def test_filters(self):
+        self.add_member(0, is_featured=True)
+        self.add_member(1, is_active=False)
+        other = TeamMember.objects.create(first_name="Other", last_name="Member")
+
+        def names(query):
+            return [item["last_name"] for item in self.client.get(self.url + query).json()["items"]]
+
+        self.assertNotIn("1", names(""))
+        self.assertEqual(names("?is_featured=true"), ["0"])
+        self.assertEqual(names("?is_active=false"), ["1"])
+        self.assertEqual(names("?department=%d" % self.department.id), ["0"])
+        self.assertEqual(names("?department=%d&is_active=false" % self.department.id), ["1"])
+        self.assertEqual(names("?role=%d&is_active=true" % self.role.id), ["0"])
+        self.assertNotIn(other.last_name, names("?department=%d" % self.department.id))
+
+    def test_find_by_author_slug(self):
+        member = self.add_member(0, is_author=True, author_slug="member-zero")
+
+        response = self.client.get(self.url + "find/?author_slug=member-zero")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.client.get(response["Location"]).json()["id"], member.id)
+        self.assertEqual(self.client.get(self.url + "find/?author_slug=missing").status_code, 404)
+
+
+class FAQAPITests(SnippetAPITestCase):
+    """
+    Tests the FAQ and FAQ collections endpoints.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.billing = FAQCategory.objects.create(name="Billing", display_order=2)
+        self.general = FAQCategory.objects.create(name="General", display_order=1)
+        FAQCategory.objects.create(name="Empty", display_order=0)
+
+    def test_grouped_by_category(self):
+        FAQItem.objects.create(question="Refunds?", answer="<p>Yes</p>", category=self.billing)
+        FAQItem.objects.create(question="Hidden?", answer="<p>No</p>", category=self.billing, is_published=False)
+        FAQItem.objects.create(question="Who?", answer="<p>Us</p>", category=self.general, display_order=2)
+        FAQItem.objects.create(question="What?", answer="<p>This</p>", category=self.general, display_order=1)
+        FAQItem.objects.create(question="Why?", answer="<p>Because</p>")
+
+        data = self.client.get("/api/v2/faq/").json()
+        self.assertEqual([category["name"] for category in data["categories"]], ["General", "Billing"])
+        self.assertEqual([item["question"] for item in data["categories"][0]["items"]], ["What?", "Who?"])
+        self.assertEqual([item["question"] for item in data["categories"][1]["items"]], ["Refunds?"])
+        self.assertEqual(data["categories"][1]["items"][0]["answer"], "<p>Yes</p>")
+        self.assertEqual([item["question"] for item in data["uncategorized"]], ["Why?"])
+
+    def add_items(self, count):
+        for i in range(count):
+            FAQItem.objects.create(question="Q%d?" % i, answer="<p>A</p>", category=[self.billing, self.general][i % 2])
+
+    def test_constant_queries(self):
+        self.add_items(1)
+        self.assertConstantQueries("/api/v2/faq/", lambda: self.add_items(10))
+
+    def test_cached_until_saved(self):
+        item = FAQItem.objects.create(question="Refunds?", answer="<p>Yes</p>", category=self.billing)
+
+        self.assertEqual(self.client.get("/api/v2/faq/")["X-Cache"], "MISS")
+        response = self.client.get("/api/v2/faq/")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(self.client.get("/api/v2/faq/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+        item.question = "Refunds, really?"
+        item.save()
+        response = self.client.get("/api/v2/faq/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["categories"][0]["items"][0]["question"], "Refunds, really?")
+
+    def add_collection(self, title, size):
+        collection = FAQCollection.objects.create(title=title)
+        for i in range(size):
+            item = FAQItem.objects.create(question="Q%d?" % i, answer="<p>A%d</p>" % i, category=self.billing)
+            FAQCollectionItem.objects.create(collection=collection, faq_item=item, sort_order=i)
+        return collection
+
+    def test_collections(self):
+        collection = self.add_collection("Product FAQs", 3)
+
+        data = self.client.get("/api/v2/faq_collections/?limit=20").json()
+        items = data["items"][0]["collection_items"]
+        self.assertEqual([entry["faq_item"]["question"] for entry in items], ["Q0?", "Q1?", "Q2?"])
+        self.assertEqual(items[0]["faq_item"]["answer"], "<p>A0</p>")
+        self.assertEqual(items[0]["faq_item"]["category"]["name"], "Billing")
+
+        self.assertEqual(self.client.get("/api/v2/faq_collections/")["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/api/v2/faq_collections/")["X-Cache"], "HIT")
+        collection.title = "Pricing FAQs"
+        collection.save()
+        response = self.client.get("/api/v2/faq_collections/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["items"][0]["title"], "Pricing FAQs")
+
+    def test_collections_constant_queries(self):
+        self.add_collection("Product FAQs", 1)
+        data = self.assertConstantQueries(
+            "/api/v2/faq_collections/?limit=20", lambda: self.add_collection("Pricing FAQs", 5)
+        )
+        self.assertEqual(len(data["items"]), 2)
+
+
+class RichTextExpansionTests(WagtailPageTestCase):
+    """
+    Tests that rich text across a response is expanded in a single pass.
+    """
+
+    def setUp(self):
+        self.home = Page.objects.get(slug="home")
+        self.pages = [
+            self.home.add_child(instance=FlexiblePage(title="Linked %d" % i, slug="linked-%d" % i))
+            for i in range(10)
+        ]
+        self.images = [
+            Image.objects.create(title="Embedded %d" % i, file=get_test_image_file())
+            for i in range(10)
+        ]
+        for image in self.images:
+            image.get_rendition("width-500")
+
+    def rich_text(self, i):
+        return (
+            '<p>See <a linktype="page" id="%d">page %d</a>, '
+            '<a href="https://example.com">elsewhere</a> and <a linktype="page" id="0">nothing</a>.</p>'
+            '<embed embedtype="image" id="%d" format="left" alt="Image %d"/>'
+        ) % (self.pages[i].id, i, self.images[i].id, i)
+
+    def test_same_output_as_expand_db_html(self):
+        sources = [self.rich_text(i) for i in range(3)] + ['', '<p>Plain</p>', '<p>\x00</p>']
+
+        self.assertEqual(expand_db_html_many(sources), [expand_db_html(source) for source in sources])
+        self.assertEqual(expand_db_html_many([]), [])
+
+    def serialize_news(self, count):
+        page = HomePage(title="News", content_sections=[
+            {'type': 'news_section', 'id': 'news', 'value': {
+                'section_title': 'News',
+                'news_items': [
+                    {'title': 'News %d' % i, 'summary': self.rich_text(i)}
+                    for i in range(count)
+                ],
+            }},
+        ])
+        with CaptureQueriesContext(connection) as context:
+            data = StreamFieldSerializer().to_representation(page.content_sections)
+        return len(context.captured_queries), data
+
+    def test_query_count_does_not_depend_on_number_of_links(self):
+        # Warm up site root paths
+        self.serialize_news(1)
+
+        few_queries, _ = self.serialize_news(2)
+        many_queries, data = self.serialize_news(10)
+
+        self.assertEqual(many_queries, few_queries)
+        summary = data[0]['value']['news_items'][9]['summary']
+        self.assertEqual(summary, expand_db_html(self.rich_text(9)))
+        self.assertIn('href="/linked-9/"', summary)
+
+
+class PageSnapshotTests(WagtailPageTestCase):
+    """
+    Tests the page_by_slug payloads rendered when pages are published.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.home = Page.objects.get(slug="home")
+        self.section = self.home.add_child(instance=FlexiblePage(title="Section", slug="section"))
+        self.section.save_revision().publish()
+        self.page = self.section.add_child(instance=HomePage(
+            title="Snapshot", slug="snapshot",
+            content_sections=[{'type': 'stats_section', 'value': {'title': 'Stats', 'stats': []}}],
+        ))
+        self.page.save_revision().publish()
+        self.url = "/api/v2/page-by-slug/?slug=snapshot"
+
+    def get_snapshot_data(self):
+        return json.loads(bytes(PageSnapshot.objects.get(page=self.page).body))
+
+    def test_publishing_builds_snapshot(self):
+        snapshot = PageSnapshot.objects.get(page=self.page)
+        self.page.refresh_from_db()
+
+        self.assertEqual(snapshot.revision_id, self.page.live_revision_id)
+        self.assertEqual(bytes(snapshot.body), render_page(load_page(self.page)))
+
+    def test_page_by_slug_serves_snapshot(self):
+        with self.assertNumQueries(3):
+            # The page row, the site and the snapshot
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, bytes(PageSnapshot.objects.get(page=self.page).body))
+
+    def test_drafts_drop_snapshot(self):
+        self.client.get(self.url)
+        self.page.title = "Draft"
+        self.page.save_revision()
+
+        # Snapshots would show has_unpublished_changes as it was on publish
+        self.assertFalse(PageSnapshot.objects.filter(page=self.page).exists())
+        data = self.client.get(self.url).json()
+        self.assertEqual(data["title"], "Snapshot")
+        self.assertTrue(data["has_unpublished_changes"])
+
+    def test_image_changes_rebuild_pages_using_it(self):
+        image = Image.objects.create(title="Hero", file=get_test_image_file())
+        with self.captureOnCommitCallbacks(execute=True):
+            page = self.home.add_child(instance=HomePage(title="Hero", slug="hero", hero_image=image))
+            page.save_revision().publish()
+        snapshot = PageSnapshot.objects.get(page=self.page)
+
+        # Sizes and hashes Wagtail fills in lazily are in no payload
+        image.get_file_hash()
+        self.assertTrue(PageSnapshot.objects.filter(page=page).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.title = "Renamed image"
+            image.save()
+            self.assertFalse(PageSnapshot.objects.filter(page=page).exists())
+
+        self.assertEqual(json.loads(bytes(PageSnapshot.objects.get(page=page).body))["hero_image"]["title"], "Renamed image")
+        self.assertEqual(PageSnapshot.objects.get(page=self.page).pk, snapshot.pk)
+
+    def test_publishing_an_ancestor_rebuilds_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.title = "Renamed section"
+            self.section.save_revision().publish()
+            # Served by the serializer until the snapshot is built again
+            self.assertFalse(PageSnapshot.objects.filter(page=self.page).exists())
+
+        breadcrumbs = self.get_snapshot_data()["breadcrumbs"]
+        self.assertIn("Renamed section", [crumb["title"] for crumb in breadcrumbs])
+
+    def test_unpublishing_drops_snapshot(self):
+        self.page.unpublish()
+
+        self.assertFalse(PageSnapshot.objects.filter(page=self.page).exists())
+
+    def test_pages_endpoint_uses_stored_stream_fields(self):
+        snapshot = PageSnapshot.objects.get(page=self.page)
+        data = self.get_snapshot_data()
+        data["content_sections"] = ["stored"]
+        snapshot.body = json.dumps(data).encode()
+        snapshot.save()
+
+        detail = self.client.get("/api/v2/pages/%d/" % self.page.id).json()
+        self.assertEqual(detail["content_sections"], ["stored"])
+
+        listing = self.client.get("/api/v2/pages/?type=home.HomePage&fields=content_sections").json()
+        items = {item["id"]: item for item in listing["items"]}
+        self.assertEqual(items[self.page.id]["content_sections"], ["stored"])
+        self.assertNotEqual(items[self.home.id]["content_sections"], ["stored"])
+
+    def test_pages_endpoint_skips_snapshots_without_stream_fields(self):
+        for url in ["/api/v2/pages/", "/api/v2/pages/%d/?fields=_,id,title" % self.page.id]:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            self.assertFalse([query for query in queries if "mysite_pagesnapshot" in query["sql"]])
+
+
+class ExportAPITests(WagtailPageTestCase):
+    """
+    Tests the static JSON export of the API.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.home = Page.objects.get(slug="home")
+        self.page = self.home.add_child(instance=FlexiblePage(title="Exported", slug="exported"))
+        self.page.save_revision().publish()
+
+        footer = Footer.objects.create(title="Main")
+        column = FooterColumn.objects.create(footer=footer, title="Links")
+        FooterLink.objects.create(column=column, title="Exported", link_page=self.page)
+
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.output_dir = temp_dir.name
+
+    def read(self, *path):
+        with open(os.path.join(self.output_dir, *path), "rb") as f:
+            return f.read()
+
+    def test_export(self):
+        written, unchanged, removed = export_api(self.output_dir)
+
+        self.assertEqual((unchanged, removed), (0, 0))
+        self.assertEqual(written, Page.objects.live().exclude(depth=1).count())
+        self.assertEqual(
+            self.read("pages", "exported.json"),
+            self.client.get("/api/v2/page-by-slug/?slug=exported").content,
+        )
+
+        footer = json.loads(self.read("footers.json"))[0]
+        link = footer["footer_columns"][0]["column_links"][0]
+        self.assertEqual(link["link_page"], {"id": self.page.id, "title": "Exported", "url": "/exported/"})
+
+        for name in ["navigation_menus.json", "faq.json", "team.json", "manifest.json"]:
+            self.assertTrue(os.path.exists(os.path.join(self.output_dir, name)))
+
+    def test_only_changed_pages_are_exported_again(self):
+        export_api(self.output_dir)
+        written, unchanged, removed = export_api(self.output_dir)
+        self.assertEqual((written, removed), (0, 0))
+
+        self.page.title = "Republished"
+        self.page.save_revision().publish()
+
+        written, unchanged, removed = export_api(self.output_dir)
+        self.assertEqual((written, removed), (1, 0))
+        self.assertEqual(json.loads(self.read("pages", "exported.json"))["title"], "Republished")
+
+        written, unchanged, removed = export_api(self.output_dir, full=True)
+        self.assertEqual(unchanged, 0)
+
+    def test_unpublished_pages_are_removed(self):
+        export_api(self.output_dir)
+
+        self.page.unpublish()
+
+        written, unchanged, removed = export_api(self.output_dir)
+        self.assertEqual((written, removed), (0, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "pages", "exported.json")))
+
+
+class MarkedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b'{"rendered_by": "marked"}'
+
+
+class FastJSONRendererTests(WagtailPageTestCase):
+    """
+    Tests that the fast renderer renders like DRF's JSONRenderer apart from
+    floats, and that the API uses the configured renderer.
+    """
+
+    def test_same_output_as_json_renderer(self):
+        data = {
+            "datetime": datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            "date": datetime.date(2025, 1, 2),
+            "time": datetime.time(3, 4, 5, 678901),
+            "decimal": Decimal("1.50"),
+            "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "text": "caf\u00e9 \u2028 \u2029 </script>",
+            1: [None, True, 1.5],
+        }
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_indent(self):
+        data = {"items": [{"id": 1}]}
+        context = {"indent": 4}
+        self.assertEqual(
+            FastJSONRenderer().render(data, renderer_context=context),
+            JSONRenderer().render(data, renderer_context=context),
+        )
+
+    @skipIf(orjson is None, "orjson is not installed")
+    def test_floats(self):
+        data = {"floats": [0.1, 1e16, 1.5e-7]}
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), data)
+
+        # Written as null rather than rejected
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({"nan": float("nan")})
+        self.assertEqual(FastJSONRenderer().render({"nan": float("nan")}), b'{"nan":null}')
+
+    @override_settings(API_JSON_RENDERER="mysite.tests.MarkedJSONRenderer")
+    def test_api_uses_configured_renderer(self):
+        cache.clear()
+        page = Page.objects.get(slug="home").add_child(instance=HTMLPage(title="Rendered", slug="rendered"))
+
+        for url in [
+            "/api/v2/pages/",
+            "/api/v2/pages/%d/" % page.id,
+            "/api/v2/navigation_menus/",
+            "/api/v2/page-by-slug/?slug=rendered",
+        ]:
+            self.assertEqual(self.client.get(url).json(), {"rendered_by": "marked"}, url)
+
+
+class StreamingListingTests(WagtailPageTestCase):
+    """
+    Tests the streaming mode of the pages listing.
+    """
+
+    def setUp(self):
+        cache.clear()
+        home = Page.objects.get(slug="home")
+        for i in range(5):
+            home.add_child(instance=HTMLPage(title="Page %d" % i, slug="page-%d" % i, body="<p>%d</p>" % i))
+        self.url = "/api/v2/pages/?type=home.HTMLPage&fields=body"
+
+    def test_same_items_as_listing(self):
+        with mock.patch.object(CustomPagesAPIViewSet, "stream_chunk_size", 2):
+            response = self.client.get(self.url + "&stream=true&offset=1")
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/json")
+        streamed = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(streamed, self.client.get(self.url + "&offset=1").json())
+        self.assertEqual(len(streamed["items"]), 4)
+
+    def test_empty_listing(self):
+        response = self.client.get("/api/v2/pages/?type=home.HTMLPage&stream=true&title=missing")
+
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), {"meta": {"total_count": 0}, "items": []})
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url + "&stream=yes").status_code, 400)
+        self.assertEqual(self.client.get(self.url + "&stream=true&order=random").status_code, 400)
+
+
+class CursorPaginationTests(WagtailPageTestCase):
+    """
+    Tests keyset pagination of the pages listing with ?cursor.
+    """
+
+    def setUp(self):
+        home = Page.objects.get(slug="home")
+        published = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        self.pages = []
+        for i in range(7):
+            page = home.add_child(instance=HTMLPage(title="Page %d" % i, slug="page-%d" % i))
+            # Pages share publish dates, and one has none
+            if i:
+                Page.objects.filter(pk=page.pk).update(last_published_at=published + datetime.timedelta(days=i // 2))
+            self.pages.append(page)
+        self.url = "/api/v2/pages/?type=home.HTMLPage&limit=3&cursor="
+
+    def walk(self, url):
+        ids = []
+        cursor = ""
+        while cursor is not None:
+            data = self.client.get(url + cursor).json()
+            self.assertNotIn("total_count", data["meta"])
+            ids += [item["id"] for item in data["items"]]
+            cursor = data["meta"]["next"]
+        return ids
+
+    def test_orders(self):
+        pages = Page.objects.filter(pk__in=[page.pk for page in self.pages])
+        by_path = list(pages.order_by("path").values_list("pk", flat=True))
+        by_published = [self.pages[0].pk] + list(
+            pages.exclude(pk=self.pages[0].pk).order_by("last_published_at", "pk").values_list("pk", flat=True)
+        )
+
+        self.assertEqual(self.walk(self.url), by_path)
+        self.assertEqual(self.walk(self.url.replace("cursor=", "order=last_published_at&cursor=")), by_published)
+        self.assertEqual(
+            self.walk(self.url.replace("cursor=", "order=-last_published_at&cursor=")),
+            list(reversed(by_published)),
+        )
+
+    def test_no_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(response.json()["items"]), 3)
+        self.assertFalse(any("COUNT(" in query["sql"].upper() for query in queries.captured_queries))
+
+    def test_invalid_parameters(self):
+        next_cursor = self.client.get(self.url).json()["meta"]["next"]
+
+        self.assertEqual(self.client.get(self.url + "garbage").status_code, 400)
+        self.assertEqual(self.client.get(self.url + next_cursor + "&order=last_published_at").status_code, 400)
+        self.assertEqual(self.client.get(self.url + "&order=title").status_code, 400)
+        self.assertEqual(self.client.get(self.url + "&offset=3").status_code, 400)
+        self.assertEqual(self.client.get(self.url + "&search=page").status_code, 400)
+        self.assertEqual(self.client.get(self.url + "&stream=true").status_code, 400)
+
+    def test_malformed_cursors(self):
+        def get(order, *values):
+            cursor = base64.urlsafe_b64encode(json.dumps([order, *values]).encode()).decode()
+            return self.client.get(self.url.replace("cursor=", "order=%s&cursor=%s" % (order, cursor)))
+
+        self.assertEqual(get("path").status_code, 400)
+        self.assertEqual(get("path", 1).status_code, 400)
+        self.assertEqual(get("-last_published_at", "2024-01-01T00:00:00").status_code, 400)
+        self.assertEqual(get("-last_published_at", "2024-01-01T00:00:00", "1").status_code, 400)
+        self.assertEqual(get("last_published_at", None, 1, 2).status_code, 400)
+        self.assertEqual(get("last_published_at", None, 1).status_code, 200)
+
+    def test_zero_limit(self):
+        response = self.client.get(self.url.replace("limit=3", "limit=0"))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message": "limit must be at least 1 with cursor"})
+
+
+class BundleTests(WagtailPageTestCase):
+    """
+    Tests the endpoint returning a page with the navigation menus, footer and
+    FAQ collections.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.page = Page.objects.get(slug="home").add_child(instance=HTMLPage(title="Bundled", slug="bundled"))
+        NavigationMenu.objects.create(title="Main", slug="main", link_page=self.page)
+        self.footer = Footer.objects.create(title="Main footer")
+        Footer.objects.create(title="Other footer")
+        collection = FAQCollection.objects.create(title="Product FAQs")
+        item = FAQItem.objects.create(question="Why?", answer="<p>Because</p>")
+        FAQCollectionItem.objects.create(collection=collection, faq_item=item)
+        self.url = "/api/v2/bundle/?slug=bundled&faq_collection=Product%20FAQs&faq_collection=Missing"
+
+    def test_bundle(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual(data["page"], self.client.get("/api/v2/page-by-slug/?slug=bundled").json())
+        self.assertEqual(data["navigation_menus"][0]["link"], "/bundled/")
+        self.assertEqual(data["footer"]["title"], "Main footer")
+        self.assertEqual(list(data["faq_collections"]), ["Product FAQs", "Missing"])
+        self.assertIsNone(data["faq_collections"]["Missing"])
+        faq_item = data["faq_collections"]["Product FAQs"]["collection_items"][0]["faq_item"]
+        self.assertEqual(faq_item["answer"], "<p>Because</p>")
+
+    def test_parts_are_cached_separately(self):
+        first = self.client.get(self.url)
+        self.assertEqual(
+            first["X-Cache"],
+            "page=MISS, navigation_menus=MISS, footer=MISS, faq_collection=MISS, faq_collection=MISS",
+        )
+        self.assertEqual(
+            self.client.get(self.url)["X-Cache"],
+            "page=HIT, navigation_menus=HIT, footer=HIT, faq_collection=HIT, faq_collection=HIT",
+        )
+
+        self.footer.title = "Renamed footer"
+        self.footer.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Cache"],
+            "page=HIT, navigation_menus=HIT, footer=MISS, faq_collection=HIT, faq_collection=HIT",
+        )
+        self.assertEqual(response.json()["footer"]["title"], "Renamed footer")
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_missing_slug(self):
+        self.assertEqual(self.client.get("/api/v2/bundle/").status_code, 400)
+        self.assertEqual(self.client.get("/api/v2/bundle/?slug=missing").status_code, 404)
+
+
+class PageFieldsTests(WagtailPageTestCase):
+    """
+    Tests the fields parameter of page_by_slug.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.page = Page.objects.get(slug="home").add_child(instance=HomePage(
+            title="Fields", slug="fields", seo_title="SEO title", hero_title="Hero",
+            content_sections=build_home_content(1),
+        ))
+        self.url = "/api/v2/page-by-slug/?slug=fields"
+
+    def test_only_requested_fields(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url + "&fields=title,seo_title,hero_title")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"id": self.page.id, "title": "Fields", "seo_title": "SEO title", "hero_title": "Hero"})
+        # Neither loaded nor parsed
+        for query in context.captured_queries:
+            self.assertNotIn("content_sections", query["sql"])
+            self.assertNotIn("about_content", query["sql"])
+
+    def test_stream_field(self):
+        data = self.client.get(self.url + "&fields=content_sections,breadcrumbs").json()
+
+        self.assertEqual(sorted(data), ["breadcrumbs", "content_sections", "id"])
+        self.assertEqual(data["content_sections"], self.client.get(self.url).json()["content_sections"])
+
+    def test_cached_per_fields(self):
+        self.client.get(self.url)
+
+        self.assertEqual(self.client.get(self.url + "&fields=title")["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(self.url + "&fields=title")["X-Cache"], "HIT")
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "HIT")
+
+    def test_unknown_fields(self):
+        response = self.client.get(self.url + "&fields=title,body")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "unknown fields: body"})
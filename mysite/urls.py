@@ -6,7 +6,7 @@ from wagtail.admin import urls as wagtailadmin_urls
 from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
-from mysite.api import api_router, page_by_slug
+from mysite.api import api_router, bundle, category_tree, faq, page_by_slug
 
 from search import views as search_views
 
@@ -17,6 +17,9 @@ urlpatterns = [
     path("search/", search_views.search, name="search"),
     path('api/v2/', api_router.urls),
     path('api/v2/page-by-slug/', page_by_slug, name='page_by_slug'),
+    path('api/v2/bundle/', bundle, name='bundle'),
+    path('api/v2/faq/', faq, name='faq'),
+    path('api/v2/category-tree/', category_tree, name='category_tree'),
 ]
 
 
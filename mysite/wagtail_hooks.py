@@ -0,0 +1,9 @@
+from wagtail import hooks
+
+from mysite.rich_text import BulkImageEmbedHandler
+
+
+@hooks.register('register_rich_text_features', order=1)
+def register_bulk_image_embeds(features):
+    # Runs after wagtail.images has registered the default image embed handler
+    features.register_embed_type(BulkImageEmbedHandler)
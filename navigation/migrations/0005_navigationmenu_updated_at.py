@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-16 09:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('navigation', '0004_alter_menuitem_link_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='navigationmenu',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -35,6 +35,9 @@ class NavigationMenu(ClusterableModel):
         help_text="Lower numbers appear first in the list"
     )
 
+    # Menu items are saved along with the menu, so this covers them too
+    updated_at = models.DateTimeField(auto_now=True)
+
     panels = [
         FieldPanel('title'),
         FieldPanel('slug'),
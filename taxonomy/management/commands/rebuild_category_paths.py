@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from taxonomy.models import Category
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the paths of all categories from their parents. Run after "
+        "categories are changed without being saved, such as by bulk updates"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of categories updated per query")
+
+    def handle(self, *args, **options):
+        changed = Category.rebuild_paths(batch_size=options['batch_size'])
+        self.stdout.write("Rebuilt %d category paths" % changed)
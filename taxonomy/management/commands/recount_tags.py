@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from taxonomy.models import Tag
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the use_count of all tags from their tagged items, correcting "
+        "counts missed by bulk changes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of tags recounted per transaction")
+
+    def handle(self, *args, **options):
+        changed = Tag.recount(batch_size=options['batch_size'])
+        self.stdout.write("Corrected the counts of %d tags" % changed)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    Category = apps.get_model('taxonomy', 'Category')
+    parents = dict(Category.objects.values_list('pk', 'parent_id'))
+    paths = {}
+
+    def get_path(pk, seen=()):
+        if pk not in paths:
+            parent_id = parents[pk]
+            if parent_id is None or parent_id not in parents or parent_id in seen:
+                paths[pk] = '%d/' % pk
+            else:
+                paths[pk] = '%s%d/' % (get_path(parent_id, seen + (pk,)), pk)
+        return paths[pk]
+
+    Category.objects.bulk_update(
+        [Category(pk=pk, path=get_path(pk)) for pk in parents], ['path'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taxonomy', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
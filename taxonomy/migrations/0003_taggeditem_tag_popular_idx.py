@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-16 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taxonomy', '0002_category_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaggedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tagged_items', to='taxonomy.tag')),
+            ],
+            options={
+                'verbose_name': 'Tagged Item',
+                'verbose_name_plural': 'Tagged Items',
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='tagged_item_object_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tag', 'content_type', 'object_id'), name='tagged_item_unique')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['is_active', '-use_count', 'name'], name='tag_popular_idx'),
+        ),
+    ]
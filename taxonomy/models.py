@@ -1,4 +1,9 @@
-from django.db import models
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Count
+from django.db.models.functions import Concat, Length, Substr
 from django.utils.text import slugify
 
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
@@ -7,6 +12,26 @@ from wagtail.snippets.models import register_snippet
 from wagtail.fields import RichTextField
 
 
+class CategoryQuerySet(models.QuerySet):
+    def descendant_of(self, category, inclusive=False):
+        queryset = self.filter(path__startswith=category.path)
+        if not inclusive:
+            queryset = queryset.exclude(pk=category.pk)
+        return queryset
+
+    def ancestor_of(self, category, inclusive=False):
+        ids = category.get_path_ids()
+        if not inclusive:
+            ids = ids[:-1]
+        return self.filter(pk__in=ids)
+
+
+class CategoryManager(models.Manager.from_queryset(CategoryQuerySet)):
+    def get_queryset(self):
+        # Loaded for __str__, which shows the parent's name
+        return super().get_queryset().select_related('parent')
+
+
 @register_snippet
 class Category(models.Model):
     """
@@ -39,6 +64,15 @@ class Category(models.Model):
         related_name='children',
         help_text="Parent category (leave blank for top-level)"
     )
+    # IDs of the category's ancestors and its own, each followed by a slash
+    # (e.g. "1/5/12/"), so its descendants are the categories whose path
+    # starts with its own
+    path = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
     
     # Visual
     icon = models.CharField(
@@ -109,13 +143,76 @@ class Category(models.Model):
         APIField('is_active'),
     ]
     
+    objects = CategoryManager()
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
-    
+
+        # The stored paths, rather than those of the instances, which may be
+        # out of date
+        paths = dict(
+            Category.objects.filter(pk__in=[self.pk, self.parent_id])
+            .values_list('pk', 'path')
+        )
+        old_path = paths.get(self.pk)
+        parent_path = paths.get(self.parent_id, '')
+        if old_path and parent_path.startswith(old_path):
+            raise ValueError("A category cannot be moved below itself")
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            path = '%s%d/' % (parent_path, self.pk)
+            if path != old_path:
+                if old_path:
+                    # The category and its descendants keep their place below it
+                    Category.objects.filter(path__startswith=old_path).update(
+                        path=Concat(models.Value(path), Substr('path', len(old_path) + 1))
+                    )
+                else:
+                    Category.objects.filter(pk=self.pk).update(path=path)
+                self.path = path
+
+    def clean(self):
+        super().clean()
+        if self.pk and self.parent_id and self.get_descendants(inclusive=True).filter(pk=self.parent_id).exists():
+            raise ValidationError({'parent': "A category cannot be moved below itself"})
+
+    def get_path_ids(self):
+        """IDs of the category's ancestors, from the top, and its own"""
+        return [int(pk) for pk in self.path.split('/') if pk]
+
+    def get_ancestors(self, inclusive=False):
+        return Category.objects.ancestor_of(self, inclusive).order_by(Length('path'))
+
+    def get_descendants(self, inclusive=False):
+        return Category.objects.descendant_of(self, inclusive)
+
+    @classmethod
+    def rebuild_paths(cls, batch_size=500):
+        """
+        Set the path of every category from its parent, returning the number
+        of paths that were out of date. A loop of parents is broken at the
+        category where it is found, which is treated as top-level.
+        """
+        rows = {pk: (parent_id, path) for pk, parent_id, path in cls.objects.values_list('pk', 'parent_id', 'path')}
+        paths = {}
+
+        def get_path(pk, seen=()):
+            if pk not in paths:
+                parent_id = rows[pk][0]
+                if parent_id is None or parent_id not in rows or parent_id in seen:
+                    paths[pk] = '%d/' % pk
+                else:
+                    paths[pk] = '%s%d/' % (get_path(parent_id, seen + (pk,)), pk)
+            return paths[pk]
+
+        changed = [cls(pk=pk, path=get_path(pk)) for pk, (parent_id, path) in rows.items() if path != get_path(pk)]
+        cls.objects.bulk_update(changed, ['path'], batch_size=batch_size)
+        return len(changed)
+
     def __str__(self):
-        if self.parent:
+        if self.parent_id:
             return f"{self.parent.name} > {self.name}"
         return self.name
     
@@ -125,6 +222,12 @@ class Category(models.Model):
         verbose_name_plural = "Categories"
 
 
+class TagQuerySet(models.QuerySet):
+    def popular(self):
+        """Active tags, most used first, read in use_count order from an index"""
+        return self.filter(is_active=True).order_by('-use_count', 'name')
+
+
 @register_snippet
 class Tag(models.Model):
     """
@@ -203,15 +306,87 @@ class Tag(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
     
+    objects = TagQuerySet.as_manager()
+
+    @classmethod
+    def recount(cls, batch_size=500):
+        """
+        Set the use_count of every tag from its tagged items, a batch of tags
+        at a time, returning the number of tags whose count was out of date
+        """
+        changed = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                # Locked, so counts changing meanwhile are applied after the
+                # new ones rather than lost
+                use_counts = dict(
+                    cls.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .select_for_update().values_list('pk', 'use_count')[:batch_size]
+                )
+                if not use_counts:
+                    return changed
+
+                counts = dict(
+                    TaggedItem.objects.filter(tag_id__in=use_counts).order_by()
+                    .values_list('tag_id').annotate(Count('pk'))
+                )
+                tags = [
+                    cls(pk=pk, use_count=counts.get(pk, 0))
+                    for pk, use_count in use_counts.items()
+                    if use_count != counts.get(pk, 0)
+                ]
+                cls.objects.bulk_update(tags, ['use_count'])
+
+            changed += len(tags)
+            last_pk = max(use_counts)
+
     def __str__(self):
         return self.name
     
     class Meta:
         ordering = ['-use_count', 'name']
+        indexes = [
+            models.Index(fields=['is_active', '-use_count', 'name'], name='tag_popular_idx'),
+        ]
         verbose_name = "Tag"
         verbose_name_plural = "Tags"
 
 
+class TaggedItem(models.Model):
+    """
+    A tag applied to an object of any type. The tag's use_count follows the
+    tagged items as they are saved and deleted (see
+    taxonomy.signal_handlers).
+    """
+
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='tagged_items'
+    )
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    def __str__(self):
+        return f"{self.tag.name} - {self.content_object}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tag', 'content_type', 'object_id'], name='tagged_item_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['content_type', 'object_id'], name='tagged_item_object_idx'),
+        ]
+        verbose_name = "Tagged Item"
+        verbose_name_plural = "Tagged Items"
+
+
 @register_snippet
 class Badge(models.Model):
     """
@@ -0,0 +1,67 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from django.db.models.functions import Substr
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from wagtail.models import Page
+
+from taxonomy.models import Category, Tag, TaggedItem
+
+
+def detach_category_children(instance, **kwargs):
+    # Children of a deleted category are made top-level without being saved.
+    # The stored path is read, as other categories deleted along with it may
+    # have moved it already
+    path = Category.objects.filter(pk=instance.pk).values_list('path', flat=True).first()
+    if path:
+        Category.objects.filter(path__startswith=path).exclude(pk=instance.pk).update(
+            path=Substr('path', len(path) + 1)
+        )
+
+
+def change_use_count(tag_id, change):
+    # Applied by the database, so concurrent changes are not lost
+    Tag.objects.filter(pk=tag_id).update(use_count=F('use_count') + change)
+
+
+def remember_tag(instance, raw=False, **kwargs):
+    # The tag the item had, in case it is moved to another
+    instance._saved_tag_id = None
+    if not raw and not instance._state.adding:
+        instance._saved_tag_id = (
+            TaggedItem.objects.filter(pk=instance.pk).values_list('tag_id', flat=True).first()
+        )
+
+
+def count_saved_tag(instance, raw=False, **kwargs):
+    saved_tag_id = getattr(instance, '_saved_tag_id', None)
+    if raw or saved_tag_id == instance.tag_id:
+        return
+    change_use_count(instance.tag_id, 1)
+    if saved_tag_id is not None:
+        change_use_count(saved_tag_id, -1)
+
+
+def count_deleted_tag(instance, **kwargs):
+    change_use_count(instance.tag_id, -1)
+
+
+def delete_page_tagged_items(instance, **kwargs):
+    # Tagged items point at their page through a generic foreign key, so are
+    # not deleted along with it. Each deleted item still sends post_delete,
+    # which counts it off its tag. Pages may be tagged as their own type or as
+    # Page
+    content_type_ids = {instance.content_type_id, ContentType.objects.get_for_model(Page).id}
+    TaggedItem.objects.filter(content_type_id__in=content_type_ids, object_id=instance.pk).delete()
+
+
+def register_signal_handlers():
+    pre_delete.connect(detach_category_children, sender=Category)
+
+    # Tags are counted as they are attached and removed. Bulk changes that
+    # send no signals are caught up with by the recount_tags command
+    pre_save.connect(remember_tag, sender=TaggedItem)
+    post_save.connect(count_saved_tag, sender=TaggedItem)
+    post_delete.connect(count_deleted_tag, sender=TaggedItem)
+    # Deleting a page of any type deletes its wagtailcore.Page row as well
+    post_delete.connect(delete_page_tagged_items, sender=Page)
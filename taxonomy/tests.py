@@ -0,0 +1,162 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from home.models import HTMLPage
+from taxonomy.models import Category, Tag, TaggedItem
+
+from wagtail.models import Page
+from wagtail.test.utils import WagtailPageTestCase
+
+
+class CategoryHierarchyTests(WagtailPageTestCase):
+    """
+    Tests the materialized paths of categories and the category tree endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.root = Category.objects.create(name="Products")
+        self.child = Category.objects.create(name="Software", parent=self.root)
+        self.grandchild = Category.objects.create(name="Tools", parent=self.child)
+        self.other = Category.objects.create(name="Resources", display_order=1)
+
+    def names(self, queryset):
+        return [category.name for category in queryset]
+
+    def test_paths(self):
+        self.assertEqual(self.grandchild.path, "%d/%d/%d/" % (self.root.pk, self.child.pk, self.grandchild.pk))
+        self.assertEqual(self.names(self.grandchild.get_ancestors()), ["Products", "Software"])
+        self.assertEqual(self.names(self.root.get_descendants().order_by("path")), ["Software", "Tools"])
+        self.assertEqual(self.names(self.child.get_descendants(inclusive=True).order_by("path")), ["Software", "Tools"])
+
+    def test_reparent(self):
+        self.child.parent = self.other
+        self.child.save()
+
+        self.grandchild.refresh_from_db()
+        self.assertEqual(self.names(self.grandchild.get_ancestors()), ["Resources", "Software"])
+        self.assertEqual(self.names(self.root.get_descendants()), [])
+        self.assertEqual(self.names(self.other.get_descendants().order_by("path")), ["Software", "Tools"])
+
+        self.child.parent = self.grandchild
+        with self.assertRaises(ValueError):
+            self.child.save()
+
+    def test_delete_parent(self):
+        self.child.delete()
+
+        self.grandchild.refresh_from_db()
+        self.assertIsNone(self.grandchild.parent_id)
+        self.assertEqual(self.grandchild.path, "%d/" % self.grandchild.pk)
+        self.assertEqual(self.names(self.root.get_descendants()), [])
+
+    def test_rebuild_paths(self):
+        Category.objects.update(path="")
+        Category.objects.filter(pk=self.root.pk).update(parent=self.other)
+
+        out = io.StringIO()
+        call_command("rebuild_category_paths", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Rebuilt 4 category paths")
+        self.grandchild.refresh_from_db()
+        self.assertEqual(self.names(self.grandchild.get_ancestors()), ["Resources", "Products", "Software"])
+        self.assertEqual(Category.rebuild_paths(), 0)
+
+    def test_str(self):
+        with self.assertNumQueries(1):
+            names = [str(category) for category in Category.objects.all()]
+        self.assertIn("Software > Tools", names)
+
+    def test_tree(self):
+        Category.objects.create(name="Hidden", parent=self.root, is_active=False)
+        Category.objects.create(name="Apps", parent=self.root, display_order=-1)
+
+        data = self.client.get("/api/v2/category-tree/").json()
+        self.assertEqual([category["name"] for category in data], ["Products", "Resources"])
+        self.assertEqual([category["name"] for category in data[0]["children"]], ["Apps", "Software"])
+        self.assertEqual(data[0]["children"][1]["children"][0]["name"], "Tools")
+        self.assertNotIn("parent", data[0])
+
+    def test_tree_cached_until_saved(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v2/category-tree/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len([query for query in queries if "taxonomy_category" in query["sql"]]), 1)
+
+        self.assertEqual(self.client.get("/api/v2/category-tree/")["X-Cache"], "HIT")
+        not_modified = self.client.get("/api/v2/category-tree/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.other.name = "Guides"
+        self.other.save()
+        response = self.client.get("/api/v2/category-tree/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()[1]["name"], "Guides")
+
+
+class TagUseCountTests(WagtailPageTestCase):
+    """
+    Tests that tag use counts follow the tagged items.
+    """
+
+    def setUp(self):
+        self.python = Tag.objects.create(name="Python")
+        self.django = Tag.objects.create(name="Django")
+        self.pages = list(Page.objects.all()[:2])
+
+    def tag(self, tag, page):
+        return TaggedItem.objects.create(tag=tag, content_object=page)
+
+    def use_counts(self):
+        return dict(Tag.objects.values_list("name", "use_count"))
+
+    def test_counted_as_attached_and_removed(self):
+        item = self.tag(self.python, self.pages[0])
+        self.tag(self.python, self.pages[1])
+        self.tag(self.django, self.pages[0])
+        self.assertEqual(self.use_counts(), {"Python": 2, "Django": 1})
+
+        item.tag = self.django
+        item.save()
+        item.save()
+        self.assertEqual(self.use_counts(), {"Python": 1, "Django": 2})
+
+        item.delete()
+        TaggedItem.objects.filter(tag=self.python).delete()
+        self.assertEqual(self.use_counts(), {"Python": 0, "Django": 1})
+
+    def test_deleted_with_tagged_page(self):
+        home = Page.objects.get(slug="home")
+        page = home.add_child(instance=HTMLPage(title="Tagged", slug="tagged"))
+        self.tag(self.python, page)
+        # Tagged as Page rather than its own type
+        self.tag(self.django, Page.objects.get(pk=page.pk))
+        self.tag(self.python, self.pages[0])
+
+        page_id = page.pk
+        page.delete()
+        self.assertFalse(TaggedItem.objects.filter(object_id=page_id).exists())
+        self.assertEqual(self.use_counts(), {"Python": 1, "Django": 0})
+
+    def test_popular(self):
+        self.tag(self.django, self.pages[0])
+        self.tag(self.django, self.pages[1])
+        self.tag(self.python, self.pages[0])
+        Tag.objects.create(name="Inactive", is_active=False, use_count=10)
+
+        self.assertEqual([tag.name for tag in Tag.objects.popular()], ["Django", "Python"])
+
+    def test_recount(self):
+        self.tag(self.python, self.pages[0])
+        self.tag(self.django, self.pages[0])
+        Tag.objects.update(use_count=5)
+        unused = Tag.objects.create(name="Unused", use_count=3)
+
+        out = io.StringIO()
+        call_command("recount_tags", "--batch-size=2", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Corrected the counts of 3 tags")
+        self.assertEqual(self.use_counts(), {"Python": 1, "Django": 1, unused.name: 0})
+        self.assertEqual(Tag.recount(), 0)
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teammember',
+            index=models.Index(fields=['is_active', 'display_order'], name='team_member_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teammember',
+            index=models.Index(fields=['is_featured', 'display_order'], name='team_member_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teammember',
+            index=models.Index(fields=['is_author', 'display_order'], name='team_member_author_idx'),
+        ),
+    ]
@@ -255,6 +255,12 @@ class TeamMember(ClusterableModel):
         ordering = ['display_order', 'last_name', 'first_name']
         verbose_name = "Team Member"
         verbose_name_plural = "Team Members"
+        # The API filters on these flags, in the default ordering
+        indexes = [
+            models.Index(fields=['is_active', 'display_order'], name='team_member_active_idx'),
+            models.Index(fields=['is_featured', 'display_order'], name='team_member_featured_idx'),
+            models.Index(fields=['is_author', 'display_order'], name='team_member_author_idx'),
+        ]
 
 
 class TeamMemberSocialLink(Orderable):